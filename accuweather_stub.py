@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the AccuWeather API, for offline and load testing.
+
+Serves the endpoints app.py uses, in the same response shapes, with
+made-up but plausible values:
+
+    /locations/v1/cities/search?q=<city>
+    /currentconditions/v1/<key>
+    /forecasts/v1/daily/1day/<key>  and  /forecasts/v1/daily/5day/<key>
+    /forecasts/v1/hourly/12hour/<key>
+
+Latency, error rate and a daily quota can be set on the command line
+and changed while it runs (POST /stub/config with a JSON body); call
+counts are at /stub/stats.  Point the app at it with:
+
+    python accuweather_stub.py --port 8001 --latency 0.2 --error-rate 0.05 --quota 500
+    ACCUWEATHER_BASE_URL=http://127.0.0.1:8001 ACCUWEATHER_API_KEY=stub python app.py
+"""
+
+import argparse
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from flask import Flask, jsonify, request
+
+QUOTA_EXCEEDED = {
+    'Code': 'ServiceUnavailable',
+    'Message': 'The allowed number of requests has been exceeded.',
+    'Reference': '/stub'
+}
+CONDITIONS = ['Clear', 'Mostly clear', 'Partly cloudy', 'Intermittent clouds', 'Mostly cloudy', 'Cloudy']
+
+
+class StubConfig:
+    """Behaviour of the stub; every field can be changed at runtime"""
+
+    FIELDS = {'latency': float, 'jitter': float, 'error_rate': float, 'quota': int, 'unknown_cities': list}
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, quota=None, unknown_cities=('Atlantis',)):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota = quota
+        self.unknown_cities = list(unknown_cities)
+
+    def update(self, values):
+        for name, value in values.items():
+            if name not in self.FIELDS:
+                raise ValueError(f"Unknown setting: {name}")
+            setattr(self, name, None if value is None else self.FIELDS[name](value))
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+def location_key(city):
+    return str(100000 + zlib.crc32(city.strip().lower().encode('utf-8')) % 900000)
+
+
+def _weather(key, when):
+    """Plausible values that stay stable for a location and hour"""
+    rng = random.Random(f"{key}-{when:%Y%m%d%H}")
+    base = 8 + int(key) % 20
+    return {
+        'temperature': round(base + 6 * rng.random() - 3, 1),
+        'humidity': rng.randint(25, 90),
+        'wind_kmh': round(rng.uniform(2, 25), 1),
+        'pressure': round(965 + (int(key) % 50) + rng.uniform(-3, 3), 1),
+        'cloud_cover': rng.randint(0, 100),
+        'text': rng.choice(CONDITIONS)
+    }
+
+
+def current_conditions(key):
+    now = datetime.now()
+    w = _weather(key, now)
+    return [{
+        'LocalObservationDateTime': now.replace(microsecond=0).isoformat() + '+05:30',
+        'WeatherText': w['text'],
+        'Temperature': {'Metric': {'Value': w['temperature'], 'Unit': 'C'}},
+        'RealFeelTemperature': {'Metric': {'Value': round(w['temperature'] - 1.5, 1), 'Unit': 'C'}},
+        'RelativeHumidity': w['humidity'],
+        'Wind': {'Direction': {'Localized': random.choice(['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW'])},
+                 'Speed': {'Metric': {'Value': w['wind_kmh'], 'Unit': 'km/h'}}},
+        'Pressure': {'Metric': {'Value': w['pressure'], 'Unit': 'mb'}},
+        'Visibility': {'Metric': {'Value': random.choice([8.0, 10.0, 16.1]), 'Unit': 'km'}},
+        'CloudCover': w['cloud_cover'],
+        'UVIndex': random.randint(0, 8)
+    }]
+
+
+def daily_forecast(key, days):
+    today = datetime.now().replace(hour=7, minute=0, second=0, microsecond=0)
+    forecasts = []
+    for offset in range(days):
+        day = today + timedelta(days=offset)
+        w = _weather(key, day)
+        forecasts.append({
+            'Date': day.isoformat() + '+05:30',
+            'Sun': {'Rise': day.replace(hour=6, minute=30).isoformat(),
+                    'Set': day.replace(hour=17, minute=45).isoformat()},
+            'Moon': {'Phase': random.choice(['WaxingCrescent', 'First', 'WaxingGibbous', 'Full'])},
+            'Temperature': {'Minimum': {'Value': round(w['temperature'] - 6, 1), 'Unit': 'C'},
+                            'Maximum': {'Value': round(w['temperature'] + 4, 1), 'Unit': 'C'}},
+            'Day': {'IconPhrase': w['text'], 'RelativeHumidity': {'Average': w['humidity']},
+                    'Wind': {'Speed': {'Value': w['wind_kmh'], 'Unit': 'km/h'}},
+                    'CloudCover': w['cloud_cover']},
+            'Night': {'IconPhrase': random.choice(CONDITIONS)}
+        })
+    return {'Headline': {'Text': 'Stub forecast'}, 'DailyForecasts': forecasts}
+
+
+def hourly_forecast(key):
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    hours = []
+    for offset in range(12):
+        hour = start + timedelta(hours=offset)
+        w = _weather(key, hour)
+        hours.append({
+            'DateTime': hour.isoformat() + '+05:30',
+            'IconPhrase': w['text'],
+            'Temperature': {'Value': w['temperature'], 'Unit': 'C'},
+            'RelativeHumidity': w['humidity'],
+            'Wind': {'Speed': {'Value': w['wind_kmh'], 'Unit': 'km/h'}},
+            'CloudCover': w['cloud_cover']
+        })
+    return hours
+
+
+def create_stub_app(config=None):
+    """Flask app serving the stub endpoints according to `config`"""
+    config = config or StubConfig()
+    stub = Flask(__name__)
+    stats = {'calls': 0, 'served': 0, 'errors': 0, 'quota_rejections': 0, 'unauthorized': 0}
+    lock = threading.Lock()
+
+    @stub.before_request
+    def simulate_upstream():
+        if request.path.startswith('/stub/'):
+            return None
+
+        delay = config.latency + random.uniform(0, config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        with lock:
+            stats['calls'] += 1
+            if not request.args.get('apikey'):
+                stats['unauthorized'] += 1
+                return jsonify({'Code': 'Unauthorized', 'Message': 'Api Authorization failed'}), 401
+            if config.quota is not None and stats['served'] >= config.quota:
+                stats['quota_rejections'] += 1
+                return jsonify(QUOTA_EXCEEDED), 503
+            if random.random() < config.error_rate:
+                stats['errors'] += 1
+                return jsonify({'Code': 'ServerError', 'Message': 'Stub error'}), random.choice([500, 502, 504])
+            stats['served'] += 1
+        return None
+
+    @stub.route('/locations/v1/cities/search')
+    def city_search():
+        city = request.args.get('q', '')
+        if not city or city.strip().lower() in (name.lower() for name in config.unknown_cities):
+            return jsonify([])
+        return jsonify([{'Key': location_key(city), 'LocalizedName': city.strip(),
+                         'Country': {'ID': 'IN', 'LocalizedName': 'India'}}])
+
+    @stub.route('/currentconditions/v1/<key>')
+    def current(key):
+        return jsonify(current_conditions(key))
+
+    @stub.route('/forecasts/v1/daily/<int:days>day/<key>')
+    def daily(days, key):
+        if days not in (1, 5):
+            return jsonify({'Code': 'ResourceNotFound'}), 404
+        return jsonify(daily_forecast(key, days))
+
+    @stub.route('/forecasts/v1/hourly/12hour/<key>')
+    def hourly(key):
+        return jsonify(hourly_forecast(key))
+
+    @stub.route('/stub/stats')
+    def stub_stats():
+        with lock:
+            return jsonify(dict(stats, config=config.as_dict()))
+
+    @stub.route('/stub/config', methods=['POST'])
+    def stub_config():
+        try:
+            config.update(request.get_json(force=True) or {})
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(config.as_dict())
+
+    @stub.route('/stub/reset', methods=['POST'])
+    def stub_reset():
+        with lock:
+            stats.update(dict.fromkeys(stats, 0))
+        return jsonify(stats)
+
+    return stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local AccuWeather stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every call')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random delay, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with a 5xx')
+    parser.add_argument('--quota', type=int, help='Successful calls allowed before every call gets a 503')
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.quota)
+    print(f"🛰️  AccuWeather stub on http://{args.host}:{args.port} {config.as_dict()}")
+    create_stub_app(config).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,46 +1,124 @@
-from flask import Flask, render_template, jsonify, Response
+from flask import Flask, render_template, jsonify, Response, request, g
+from werkzeug.http import http_date
 import pandas as pd
-import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
 import numpy as np
 from dotenv import load_dotenv
+from historical_data import HistoricalArchive
+from response_cache import ResponseCache, CallBudget, SingleFlight
+from http_client import HttpClient, RETRY_STATUSES
+from snapshot_store import SnapshotWriter, SNAPSHOT_FILE, read_tail, read_manifest
+from collector import SnapshotCollector
+from location_store import LocationKeyStore
+from circuit_breaker import CircuitBreaker
+from metrics import MetricsRegistry
+from profiling import RequestProfiler, current_session
+from logging_config import configure_logging, mask_api_keys, set_level, set_upstream_tracing, upstream_tracing_enabled, UPSTREAM_LOGGER
+from update_feed import UpdateFeed, format_event, parse_event_id
+import atexit
+import contextvars
+import hmac
+import logging
+import zlib
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 
 load_dotenv()
+configure_logging()
+logger = logging.getLogger(__name__)
+upstream_log = logging.getLogger(UPSTREAM_LOGGER)
 app = Flask(__name__)
 
+# Prometheus metrics, served at /metrics
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram(
+    'telescope_stage_seconds', 'Time spent in each stage of the dashboard handler', ['stage'])
+UPSTREAM_SECONDS = metrics.histogram(
+    'telescope_upstream_request_seconds', 'AccuWeather call latency including retries', ['endpoint', 'status'])
+REQUEST_SECONDS = metrics.histogram(
+    'telescope_http_request_seconds', 'Time to build each HTTP response', ['route', 'method', 'status'])
+
+def timed_stage(stage, fn):
+    """Wrap fn so each call is recorded under STAGE_SECONDS{stage=...}"""
+    def run(*args, **kwargs):
+        with STAGE_SECONDS.time(stage=stage):
+            return fn(*args, **kwargs)
+    return run
+
 ACCUWEATHER_API_KEY = os.getenv('ACCUWEATHER_API_KEY')
+# Point at accuweather_stub.py for offline and load testing
+ACCUWEATHER_BASE_URL = os.getenv('ACCUWEATHER_BASE_URL', 'https://dataservice.accuweather.com').rstrip('/')
 
-# Load CSV data with proper error handling
-try:
-    df = pd.read_csv('UTTRAKHAND_ISRO0019_2012-11-02_2019-01-02_Nov2025_175236.csv')
-    print(f"Loaded CSV with {len(df)} records")
-    
-    # Clean and prepare the data with multiple date format handling
-    def parse_date(date_str):
-        formats = ['%m-%d-%Y', '%m/%d/%Y', '%Y-%m-%d', '%d-%m-%Y']
-        for fmt in formats:
-            try:
-                return pd.to_datetime(date_str, format=fmt)
-            except:
-                continue
-        return pd.NaT
-    
-    df['DATE(IST)'] = df['DATE(IST)'].apply(parse_date)
-    df = df.dropna(subset=['DATE(IST)'])
-    
-    # Ensure numeric columns are properly typed
-    numeric_columns = ['AIR_TEMP(°C)', 'HUMIDITY(%)', 'WIND_SPEED(m/s)', 'ATMO_PRESSURE(hpa)']
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    print(f"Successfully processed {len(df)} valid records")
-    print(f"Date range: {df['DATE(IST)'].min()} to {df['DATE(IST)'].max()}")
+# Seconds each kind of AccuWeather response stays fresh in the cache
+ACCUWEATHER_TTLS = {
+    'locations': 24 * 3600,
+    'current': 10 * 60,
+    'hourly': 30 * 60,
+    'daily': 3 * 3600
+}
+
+# One circuit breaker per endpoint family; an open circuit skips the call at once
+ENDPOINT_FAMILIES = {'locations': 'locations', 'current': 'current', 'daily': 'forecasts', 'hourly': 'forecasts'}
+# 401: invalid key, 403/429/503: quota exhausted or rate limited
+CIRCUIT_TRIP_STATUSES = frozenset([401, 403, 429, 503])
+circuit_breakers = {
+    family: CircuitBreaker(
+        family,
+        failure_threshold=int(os.getenv('BREAKER_FAILURE_THRESHOLD', 3)),
+        reset_timeout=int(os.getenv('BREAKER_RESET_TIMEOUT', 60)))
+    for family in sorted(set(ENDPOINT_FAMILIES.values()))
+}
+
+# Expired responses are still served (while being refreshed) for up to MAX_STALENESS seconds
+MAX_STALENESS = int(os.getenv('MAX_STALENESS', 6 * 3600))
+response_cache = ResponseCache(max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', 256)), max_stale=MAX_STALENESS)
+# Counted in DATA_CACHE_DIR, so web workers and run_collector.py share one daily allowance
+call_budget = CallBudget(int(os.getenv('ACCUWEATHER_DAILY_BUDGET', 50)),
+                         path=os.path.join(os.getenv('DATA_CACHE_DIR', '.cache'), 'call_budget.sqlite3'))
+# Calls the snapshot collector must leave in the daily budget for dashboard viewers
+COLLECTOR_BUDGET_RESERVE = int(os.getenv('COLLECTOR_BUDGET_RESERVE', call_budget.daily_limit // 2))
+# True while the collector runs, including its work on the executor pools
+collecting = contextvars.ContextVar('collecting', default=False)
+inflight_requests = SingleFlight()
+
+# Shared keep-alive connection pool for all AccuWeather calls. Statuses that trip
+# a circuit are not retried: a spent quota stays spent, and the breaker should see it at once.
+http_client = HttpClient(
+    max_retries=int(os.getenv('HTTP_MAX_RETRIES', 2)),
+    per_host_limit=int(os.getenv('HTTP_PER_HOST_LIMIT', 4)),
+    retry_statuses=RETRY_STATUSES - CIRCUIT_TRIP_STATUSES
+)
+
+# Overall time allowed for the parallel upstream stage of a request
+UPSTREAM_DEADLINE = float(os.getenv('UPSTREAM_DEADLINE', 12))
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks see the submitting thread's context variables"""
     
-except Exception as e:
-    print(f"Error loading CSV data: {e}")
-    df = pd.DataFrame()
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+# Handler stages and per-location fetches use separate pools so a stage
+# never waits on work queued behind it in its own pool
+stage_executor = ContextThreadPoolExecutor(max_workers=16, thread_name_prefix='stage')
+upstream_executor = ContextThreadPoolExecutor(max_workers=16, thread_name_prefix='upstream')
+
+HISTORICAL_DATA_FILE = os.getenv('HISTORICAL_DATA_FILE', 'UTTRAKHAND_ISRO0019_2012-11-02_2019-01-02_Nov2025_175236.csv')
+
+# CSV data (served from the columnar snapshot when the source is unchanged), loaded
+# on first use or by warm_archive() at startup, so importing the app stays fast.
+# Summaries and the calendar-day index are derived from it once per reload.
+archive = HistoricalArchive(HISTORICAL_DATA_FILE)
+
+def reload_historical_data():
+    """Reload the historical archive, invalidating its cached summaries"""
+    return archive.reload()
+
+# Append-only writer for current_weather_data.csv
+snapshot_writer = SnapshotWriter(SNAPSHOT_FILE, batch_size=int(os.getenv('SNAPSHOT_BATCH_SIZE', 1)))
+atexit.register(snapshot_writer.flush)
 
 LOCATIONS = {
     'beluwakhan': {'name': 'Beluwakhan', 'temp': 15.2, 'humidity': 65, 'wind': 2.1, 'pressure': 965.5},
@@ -57,33 +135,210 @@ LOCATION_KEYS = {
     'Mumbai': '204842'       # Mumbai, India
 }
 
-def get_location_key(city_name):
-    if not ACCUWEATHER_API_KEY:
-        return None
+# Every other city is searched once and remembered on disk (misses for a shorter time).
+# The store is opened and seeded on first use, so importing the app touches no files.
+location_keys = None
+location_keys_lock = threading.Lock()
+
+def get_location_store():
+    global location_keys
+    with location_keys_lock:
+        if location_keys is None:
+            store = LocationKeyStore(
+                os.path.join(os.getenv('DATA_CACHE_DIR', '.cache'), 'location_keys.sqlite3'),
+                negative_ttl=int(os.getenv('LOCATION_NEGATIVE_TTL', 6 * 3600))
+            )
+            store.seed(LOCATION_KEYS)
+            location_keys = store
+        return location_keys
+
+def accuweather_cache_key(path, params):
+    return (path, tuple(sorted(params.items())))
+
+def fetch_accuweather_entry(endpoint, path, params=None, timeout=10, allow_stale=None):
+    """Cache entry for an AccuWeather resource (stale-while-revalidate)
+
+    A fresh entry is returned as is. An expired one still within
+    MAX_STALENESS is returned straight away while a background refresh
+    replaces it. Only a resource with no usable entry waits on the
+    upstream; None when that call fails or today's call budget is spent.
+    
+    With allow_stale=False (the default for the collector, whose snapshots
+    must be current) an expired entry is re-fetched before returning.
+    """
+    params = params or {}
+    cache_key = accuweather_cache_key(path, params)
+    if allow_stale is None:
+        allow_stale = not collecting.get()
     
-    # Try pre-defined keys first
-    if city_name in LOCATION_KEYS:
-        return LOCATION_KEYS[city_name]
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    # Fallback to API search
-    url = "https://dataservice.accuweather.com/locations/v1/cities/search"
-    params = {'apikey': ACCUWEATHER_API_KEY, 'q': city_name}
+    stale = response_cache.get_stale(cache_key) if allow_stale else None
+    if stale is not None:
+        refresh_in_background(endpoint, path, params, timeout, cache_key)
+        return stale
+    
+    # Concurrent misses for the same resource share one upstream call
+    return inflight_requests.do(
+        cache_key, lambda: _request_accuweather(endpoint, path, params, timeout, cache_key))
+
+def fetch_accuweather(endpoint, path, params=None, timeout=10, allow_stale=None):
+    """Fetch JSON from AccuWeather, going through the shared response cache
+
+    Returns None when the call fails or today's call budget is spent.
+    """
+    entry = fetch_accuweather_entry(endpoint, path, params, timeout, allow_stale)
+    return entry.value if entry is not None else None
+
+refreshing = set()
+refreshing_lock = threading.Lock()
+
+def refresh_in_background(endpoint, path, params, timeout, cache_key):
+    """Re-fetch a stale resource on the upstream pool, once per key at a time"""
+    with refreshing_lock:
+        if cache_key in refreshing:
+            return
+        refreshing.add(cache_key)
     
+    def refresh():
+        try:
+            inflight_requests.do(
+                cache_key, lambda: _request_accuweather(endpoint, path, params, timeout, cache_key))
+        except Exception as e:
+            logger.warning("Background refresh of %s failed: %s", path, e)
+        finally:
+            with refreshing_lock:
+                refreshing.discard(cache_key)
+    
+    upstream_executor.submit(refresh)
+
+def budget_reserve():
+    """Calls the current caller may not spend: the collector leaves a reserve for viewers"""
+    return COLLECTOR_BUDGET_RESERVE if collecting.get() else 0
+
+def acquire_upstream_call(endpoint, path):
+    """Check the endpoint's circuit breaker and the daily budget before a call"""
+    breaker = circuit_breakers[ENDPOINT_FAMILIES[endpoint]]
+    if not breaker.allow():
+        upstream_log.debug("Circuit %r is open, skipping %s", breaker.name, path)
+        return False
+    if not call_budget.try_acquire(reserve=budget_reserve()):
+        breaker.release()
+        logger.warning("AccuWeather daily call budget used up, skipping %s", path)
+        return False
+    return True
+
+def charge_retry(path):
+    """Charge a retry to the daily budget, since each one is a real AccuWeather call"""
+    if call_budget.try_acquire(reserve=budget_reserve()):
+        return True
+    logger.warning("AccuWeather daily call budget used up, not retrying %s", path)
+    return False
+
+def upstream_error(e):
+    """Failed call description for breaker status; error texts quote the URL, API key included"""
+    return mask_api_keys(f"{type(e).__name__}: {e}")
+
+def _request_accuweather(endpoint, path, params, timeout, cache_key):
+    if not acquire_upstream_call(endpoint, path):
+        return None
+    
+    url = f"{ACCUWEATHER_BASE_URL}{path}"
+    started = time.perf_counter()
     try:
-        response = requests.get(url, params=params, timeout=10)
-        print(f"Location search for {city_name}: Status {response.status_code}")
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                print(f"Found location key: {data[0]['Key']} for {city_name}")
-                return data[0]['Key']
+        response = http_client.get(url, params=dict(params, apikey=ACCUWEATHER_API_KEY), timeout=timeout,
+                                   may_retry=lambda: charge_retry(path))
+    except Exception as e:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status='error')
+        circuit_breakers[ENDPOINT_FAMILIES[endpoint]].record_failure(upstream_error(e))
+        raise
+    UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status=response.status_code)
+    return handle_accuweather_response(endpoint, path, cache_key, response)
+
+def handle_accuweather_response(endpoint, path, cache_key, response):
+    """Cache a successful response and return its cache entry, None otherwise
+
+    Shared by the sync client and the async one in asgi.py.
+    """
+    upstream_log.debug("AccuWeather %s %s: Status %s", endpoint, path, response.status_code)
+    breaker = circuit_breakers[ENDPOINT_FAMILIES[endpoint]]
+    
+    if response.status_code != 200:
+        logger.warning("AccuWeather %s returned %s: %s", endpoint, response.status_code, response.text[:200])
+        if response.status_code in CIRCUIT_TRIP_STATUSES or response.status_code >= 500:
+            breaker.record_failure(f"HTTP {response.status_code}",
+                                   trip=response.status_code in CIRCUIT_TRIP_STATUSES)
         else:
-            print(f"API Error: {response.status_code} - {response.text}")
+            breaker.record_success()  # the endpoint answered; the request itself was bad
+        return None
+    
+    breaker.record_success()
+    return response_cache.set(cache_key, response.json(), ttl=ACCUWEATHER_TTLS[endpoint])
+
+def data_freshness(entry):
+    """Age label for data served from the response cache"""
+    return {
+        'data_age_seconds': int(entry.age()),
+        'stale': not entry.is_fresh()
+    }
+
+def run_concurrently(executor, tasks, deadline=None):
+    """Run independent calls in parallel, waiting at most `deadline` seconds in total
+
+    `tasks` maps a name to (function, args, fallback). A call that raises or
+    misses the deadline yields fallback() instead of its result.
+    """
+    deadline = UPSTREAM_DEADLINE if deadline is None else deadline
+    # Work for a profiled request is profiled on the executor threads too
+    session = current_session()
+    wrap = session.wrap if session is not None else (lambda fn: fn)
+    futures = {name: executor.submit(wrap(fn), *args) for name, (fn, args, _) in tasks.items()}
+    wait(futures.values(), timeout=deadline)
+    
+    results = {}
+    for name, future in futures.items():
+        fallback = tasks[name][2]
+        if not future.done():
+            future.cancel()
+            logger.warning("%s missed the %ss deadline, using fallback", name, deadline)
+            results[name] = fallback()
+        elif future.exception() is not None:
+            logger.warning("%s failed: %s", name, future.exception())
+            results[name] = fallback()
+        else:
+            results[name] = future.result()
+    return results
+
+def search_location_key(city_name):
+    """Location key from the city search; None if no city matched"""
+    data = fetch_accuweather('locations', '/locations/v1/cities/search', {'q': city_name})
+    if data is None:
+        raise LookupError(f"Location search unavailable for {city_name}")
+    if not data:
+        logger.info("No location found for %s", city_name)
+        return None
+    logger.info("Found location key %s for %s", data[0]['Key'], city_name)
+    return data[0]['Key']
+
+def get_location_key(city_name):
+    if not ACCUWEATHER_API_KEY:
+        return None
+    
+    try:
+        return get_location_store().resolve(city_name, search_location_key)
     except Exception as e:
-        print(f"Location search error: {e}")
+        logger.warning("Location search error: %s", e)
     
     return None
 
+def resolve_location_keys(city_names):
+    """Resolve a list of cities up front, searching the unknown ones in parallel"""
+    if not ACCUWEATHER_API_KEY:
+        return {}
+    return get_location_store().resolve_many(city_names, search_location_key, upstream_executor)
+
 def get_current_and_today_weather(location='beluwakhan'):
     """Get both current conditions and today's detailed weather from AccuWeather"""
     loc_data = LOCATIONS.get(location, LOCATIONS['beluwakhan'])
@@ -92,85 +347,83 @@ def get_current_and_today_weather(location='beluwakhan'):
         try:
             city_name = loc_data['name']
             location_key = get_location_key(city_name)
-            print(f"Getting weather for {city_name} with key: {location_key}")
+            upstream_log.debug("Getting weather for %s with key %s", city_name, location_key)
             
             if location_key:
-                # Get current conditions
-                current_url = f"https://dataservice.accuweather.com/currentconditions/v1/{location_key}"
-                current_params = {'apikey': ACCUWEATHER_API_KEY, 'details': 'true'}
+                # Get current conditions and today's forecast
+                current_entry = fetch_accuweather_entry(
+                    'current', f"/currentconditions/v1/{location_key}", {'details': 'true'})
+                today_response = fetch_accuweather(
+                    'daily', f"/forecasts/v1/daily/1day/{location_key}", {'details': 'true', 'metric': 'true'})
                 
-                # Get today's forecast
-                today_url = f"https://dataservice.accuweather.com/forecasts/v1/daily/1day/{location_key}"
-                today_params = {'apikey': ACCUWEATHER_API_KEY, 'details': 'true', 'metric': 'true'}
-                
-                print(f"Fetching current conditions from: {current_url}")
-                current_response = requests.get(current_url, params=current_params, timeout=10)
-                print(f"Current conditions response: {current_response.status_code}")
-                
-                print(f"Fetching today's forecast from: {today_url}")
-                today_response = requests.get(today_url, params=today_params, timeout=10)
-                print(f"Today's forecast response: {today_response.status_code}")
-                
-                if current_response.status_code == 200:
-                    current_data = current_response.json()[0]
-                    print(f"Current temperature from API: {current_data['Temperature']['Metric']['Value']}°C")
-                    
-                    # Get today's data if available
-                    today_data = None
-                    if today_response.status_code == 200:
-                        today_data = today_response.json()['DailyForecasts'][0]
-                    
-                    # Combine current and today's data
-                    result = {
-                        'location': city_name,
-                        'current_time': current_data.get('LocalObservationDateTime', datetime.now().isoformat()),
-                        'temperature': round(current_data['Temperature']['Metric']['Value'], 1),
-                        'feels_like': round(current_data.get('RealFeelTemperature', {}).get('Metric', {}).get('Value', current_data['Temperature']['Metric']['Value']), 1),
-                        'humidity': current_data.get('RelativeHumidity', 50),
-                        'wind_speed': round(current_data['Wind']['Speed']['Metric']['Value'] / 3.6, 1),
-                        'wind_direction': current_data['Wind'].get('Direction', {}).get('Localized', 'N/A'),
-                        'pressure': round(current_data['Pressure']['Metric']['Value'], 1),
-                        'visibility': current_data.get('Visibility', {}).get('Metric', {}).get('Value', 10),
-                        'cloud_cover': current_data.get('CloudCover', 0),
-                        'weather_text': current_data.get('WeatherText', 'Clear'),
-                        'uv_index': current_data.get('UVIndex', 0),
-                        'api_source': 'AccuWeather Live Data'
-                    }
-                    
-                    # Add today's data if available
-                    if today_data:
-                        result.update({
-                            'today_min_temp': round(today_data['Temperature']['Minimum']['Value'], 1),
-                            'today_max_temp': round(today_data['Temperature']['Maximum']['Value'], 1),
-                            'today_day_conditions': today_data['Day'].get('IconPhrase', 'N/A'),
-                            'today_night_conditions': today_data['Night'].get('IconPhrase', 'N/A'),
-                            'sunrise': today_data.get('Sun', {}).get('Rise', 'N/A'),
-                            'sunset': today_data.get('Sun', {}).get('Set', 'N/A'),
-                            'moon_phase': today_data.get('Moon', {}).get('Phase', 'N/A')
-                        })
-                    else:
-                        # Fallback values for today's data
-                        result.update({
-                            'today_min_temp': round(result['temperature'] - 5, 1),
-                            'today_max_temp': round(result['temperature'] + 3, 1),
-                            'today_day_conditions': 'Fair',
-                            'today_night_conditions': 'Clear',
-                            'sunrise': '06:30',
-                            'sunset': '18:00',
-                            'moon_phase': 'N/A'
-                        })
-                    
-                    print(f"Returning API data with temperature: {result['temperature']}°C")
-                    return result
+                if current_entry is not None and current_entry.value:
+                    weather = parse_current_weather(city_name, current_entry.value, today_response)
+                    weather.update(data_freshness(current_entry))
+                    return weather
                 else:
-                    print(f"API request failed: {current_response.status_code} - {current_response.text}")
-        except Exception as e:
-            print(f"API Error for {location}: {e}")
-            import traceback
-            traceback.print_exc()
+                    logger.warning("No current conditions for %s, using fallback", city_name)
+        except Exception:
+            logger.exception("Current weather for %s failed", location)
+    
+    return get_simulated_weather(location)
+
+def parse_current_weather(city_name, current_response, today_response):
+    """Combine AccuWeather current conditions and 1-day forecast responses"""
+    current_data = current_response[0]
+    upstream_log.debug("Current temperature from API: %s°C", current_data['Temperature']['Metric']['Value'])
+    
+    # Get today's data if available
+    today_data = None
+    if today_response:
+        today_data = today_response['DailyForecasts'][0]
+    
+    # Combine current and today's data
+    result = {
+        'location': city_name,
+        'current_time': current_data.get('LocalObservationDateTime', datetime.now().isoformat()),
+        'temperature': round(current_data['Temperature']['Metric']['Value'], 1),
+        'feels_like': round(current_data.get('RealFeelTemperature', {}).get('Metric', {}).get('Value', current_data['Temperature']['Metric']['Value']), 1),
+        'humidity': current_data.get('RelativeHumidity', 50),
+        'wind_speed': round(current_data['Wind']['Speed']['Metric']['Value'] / 3.6, 1),
+        'wind_direction': current_data['Wind'].get('Direction', {}).get('Localized', 'N/A'),
+        'pressure': round(current_data['Pressure']['Metric']['Value'], 1),
+        'visibility': current_data.get('Visibility', {}).get('Metric', {}).get('Value', 10),
+        'cloud_cover': current_data.get('CloudCover', 0),
+        'weather_text': current_data.get('WeatherText', 'Clear'),
+        'uv_index': current_data.get('UVIndex', 0),
+        'api_source': 'AccuWeather Live Data'
+    }
+    
+    # Add today's data if available
+    if today_data:
+        result.update({
+            'today_min_temp': round(today_data['Temperature']['Minimum']['Value'], 1),
+            'today_max_temp': round(today_data['Temperature']['Maximum']['Value'], 1),
+            'today_day_conditions': today_data['Day'].get('IconPhrase', 'N/A'),
+            'today_night_conditions': today_data['Night'].get('IconPhrase', 'N/A'),
+            'sunrise': today_data.get('Sun', {}).get('Rise', 'N/A'),
+            'sunset': today_data.get('Sun', {}).get('Set', 'N/A'),
+            'moon_phase': today_data.get('Moon', {}).get('Phase', 'N/A')
+        })
+    else:
+        # Fallback values for today's data
+        result.update({
+            'today_min_temp': round(result['temperature'] - 5, 1),
+            'today_max_temp': round(result['temperature'] + 3, 1),
+            'today_day_conditions': 'Fair',
+            'today_night_conditions': 'Clear',
+            'sunrise': '06:30',
+            'sunset': '18:00',
+            'moon_phase': 'N/A'
+        })
     
-    # Enhanced fallback with realistic time-based variations
-    print(f"Using enhanced fallback data for {loc_data['name']}")
+    upstream_log.debug("Returning API data with temperature %s°C", result['temperature'])
+    return result
+
+def get_simulated_weather(location='beluwakhan'):
+    """Enhanced fallback with realistic time-based variations"""
+    loc_data = LOCATIONS.get(location, LOCATIONS['beluwakhan'])
+    logger.debug("Using enhanced fallback data for %s", loc_data['name'])
     import random
     
     # Time-based temperature variation (cooler at night, warmer during day)
@@ -221,51 +474,49 @@ def get_weather_data(location='beluwakhan'):
     """Wrapper function for backward compatibility"""
     return get_current_and_today_weather(location)
 
-def predict_telescope_conditions(weather_data):
-    score = 0
-    factors = []
-    
-    if 5 <= weather_data['temperature'] <= 20:
-        score += 25
-        factors.append("✓ Good temperature")
-    else:
-        factors.append("⚠ Temperature not ideal")
-    
-    if weather_data['humidity'] < 70:
-        score += 25
-        factors.append("✓ Low humidity")
-    else:
-        factors.append("⚠ High humidity")
-    
-    if weather_data['wind_speed'] < 3:
-        score += 25
-        factors.append("✓ Low wind")
-    else:
-        factors.append("⚠ High wind")
+# Batch flag name, message when the factor is met, message when it is not
+TELESCOPE_FACTORS = [
+    ('good_temperature', "✓ Good temperature", "⚠ Temperature not ideal"),
+    ('low_humidity', "✓ Low humidity", "⚠ High humidity"),
+    ('low_wind', "✓ Low wind", "⚠ High wind"),
+    ('good_pressure', "✓ Good pressure", "⚠ Low pressure")
+]
+
+def score_telescope_conditions_batch(temperature, humidity, wind_speed, pressure):
+    """Score many readings at once; inputs are arrays, Series or scalars (broadcast)
+
+    Returns a dict of arrays: 'score', 'recommendation' and one boolean
+    flag per entry in TELESCOPE_FACTORS.
+    """
+    temperature, humidity, wind_speed, pressure = np.broadcast_arrays(
+        *(np.asarray(values, dtype=float) for values in (temperature, humidity, wind_speed, pressure)))
     
-    if weather_data['pressure'] > 960:
-        score += 25
-        factors.append("✓ Good pressure")
-    else:
-        factors.append("⚠ Low pressure")
+    flags = {
+        'good_temperature': (temperature >= 5) & (temperature <= 20),
+        'low_humidity': humidity < 70,
+        'low_wind': wind_speed < 3,
+        'good_pressure': pressure > 960
+    }
+    score = 25 * sum(flag.astype(int) for flag in flags.values())
+    recommendation = np.select([score >= 75, score >= 50], ['Excellent', 'Good'], 'Poor')
     
-    if score >= 75:
-        recommendation = "Excellent"
-    elif score >= 50:
-        recommendation = "Good"
-    else:
-        recommendation = "Poor"
+    return dict(flags, score=score, recommendation=recommendation)
+
+def predict_telescope_conditions(weather_data):
+    result = score_telescope_conditions_batch(
+        weather_data['temperature'], weather_data['humidity'],
+        weather_data['wind_speed'], weather_data['pressure'])
     
     return {
-        'score': score,
-        'recommendation': recommendation,
-        'factors': factors
+        'score': int(result['score']),
+        'recommendation': str(result['recommendation']),
+        'factors': [good if result[flag] else bad for flag, good, bad in TELESCOPE_FACTORS]
     }
 
 def get_past_data():
     """Analyze historical data from CSV"""
     try:
-        if df.empty:
+        if archive.frame.empty:
             return {
                 'total_records': 0,
                 'optimal_days': 0,
@@ -276,30 +527,10 @@ def get_past_data():
                 'avg_pressure': 965.0
             }
         
-        df_copy = df.copy()
-        
-        # Define optimal telescope viewing conditions
-        optimal = df_copy[
-            (df_copy['HUMIDITY(%)'] < 70) & 
-            (df_copy['WIND_SPEED(m/s)'] < 3) & 
-            (df_copy['ATMO_PRESSURE(hpa)'] > 960) &
-            (df_copy['AIR_TEMP(°C)'].between(5, 20))
-        ]
-        
-        total_records = len(df_copy)
-        optimal_days = len(optimal)
-        
-        return {
-            'total_records': total_records,
-            'optimal_days': optimal_days,
-            'optimal_percentage': round((optimal_days / total_records) * 100, 1) if total_records > 0 else 0,
-            'avg_temp': round(df_copy['AIR_TEMP(°C)'].mean(), 1),
-            'avg_humidity': round(df_copy['HUMIDITY(%)'].mean(), 1),
-            'avg_wind': round(df_copy['WIND_SPEED(m/s)'].mean(), 1),
-            'avg_pressure': round(df_copy['ATMO_PRESSURE(hpa)'].mean(), 1)
-        }
+        # Computed once per archive version
+        return archive.summary()
     except Exception as e:
-        print(f"Error analyzing past data: {e}")
+        logger.exception("Error analyzing past data: %s", e)
         return {
             'total_records': 0,
             'optimal_days': 0,
@@ -313,46 +544,58 @@ def get_past_data():
 def get_historical_records_for_today():
     """Get historical records for today's date from CSV data"""
     try:
+        df = archive.frame
         if df.empty:
             return []
         
         today = datetime.now()
-        df_copy = df.copy()
         
-        # Filter for similar dates (same month and day, any year)
-        today_records = df_copy[
-            (df_copy['DATE(IST)'].dt.month == today.month) & 
-            (df_copy['DATE(IST)'].dt.day == today.day)
-        ]
+        # Similar dates (same month and day, any year)
+        rows = archive.climatology.rows(today.month, today.day)
         
         # If no exact matches, get records from the same month
-        if today_records.empty:
-            today_records = df_copy[
-                df_copy['DATE(IST)'].dt.month == today.month
-            ].head(10)  # Limit to 10 records
+        if len(rows) == 0:
+            rows = archive.climatology.month_rows(today.month)
+        
+        today_records = df.iloc[rows[:10]]  # Limit to 10 records
+        
+        # Round from each float32's shortest decimal form (0.65, not 0.6499999761)
+        # so the values match the archive text
+        columns = ['AIR_TEMP(°C)', 'HUMIDITY(%)', 'WIND_SPEED(m/s)', 'ATMO_PRESSURE(hpa)']
+        values = today_records[columns].to_numpy()
         
         records_list = []
-        for _, row in today_records.iterrows():
+        for date, row in zip(today_records.index, values):  # the index holds DATE(IST)
+            temp, humidity, wind, pressure = (round(float(str(value)), 1) for value in row)
             records_list.append({
-                'date': row['DATE(IST)'].strftime('%Y-%m-%d'),
-                'temp': round(row['AIR_TEMP(°C)'], 1),
-                'humidity': round(row['HUMIDITY(%)'], 1),
-                'wind': round(row['WIND_SPEED(m/s)'], 1),
-                'pressure': round(row['ATMO_PRESSURE(hpa)'], 1)
+                'date': date.strftime('%Y-%m-%d'),
+                'temp': temp,
+                'humidity': humidity,
+                'wind': wind,
+                'pressure': pressure
             })
         
         return records_list[:10]  # Return max 10 records
     except Exception as e:
-        print(f"Error getting historical records: {e}")
+        logger.exception("Error getting historical records: %s", e)
         return []
 
 def save_current_weather_to_csv():
     try:
         current_data = []
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        resolve_location_keys([location['name'] for location in LOCATIONS.values()])
+        
+        # Fetch all locations in parallel
+        tasks = {
+            location_key: (get_weather_data, (location_key,), lambda key=location_key: get_simulated_weather(key))
+            for location_key in LOCATIONS.keys()
+        }
+        weather_by_location = run_concurrently(upstream_executor, tasks)
         
         for location_key in LOCATIONS.keys():
-            weather = get_weather_data(location_key)
+            weather = weather_by_location[location_key]
+            publish_conditions(location_key, weather)
             current_data.append({
                 'datetime': timestamp,
                 'location': weather['location'],
@@ -364,30 +607,55 @@ def save_current_weather_to_csv():
                 'cloud_cover': weather.get('cloud_cover', 'N/A')
             })
         
-        new_df = pd.DataFrame(current_data)
-        csv_file = 'current_weather_data.csv'
-        
-        try:
-            existing_df = pd.read_csv(csv_file)
-            combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-        except FileNotFoundError:
-            combined_df = new_df
-        
-        combined_df.to_csv(csv_file, index=False)
+        snapshot_writer.append(current_data)
         return current_data
-    except:
-        return []
+    except Exception as e:
+        logger.exception("Error saving weather snapshot: %s", e)
+        raise
+
+# Snapshots are taken in the background rather than by dashboard requests
+COLLECTOR_INTERVAL = int(os.getenv('COLLECTOR_INTERVAL', 600))
+def collect_snapshot():
+    """One collector run; its AccuWeather calls leave COLLECTOR_BUDGET_RESERVE unspent"""
+    token = collecting.set(True)
+    try:
+        return save_current_weather_to_csv()
+    finally:
+        collecting.reset(token)
+
+collector = SnapshotCollector(timed_stage('snapshot_save', collect_snapshot), interval=COLLECTOR_INTERVAL)
+
+def start_collector(use_reloader=False):
+    """Start the in-process snapshot collector unless disabled via COLLECTOR_ENABLED
+
+    Under the debug reloader only the serving child process collects.
+    """
+    if os.getenv('COLLECTOR_ENABLED', 'true').lower() in ('0', 'false', 'no'):
+        return False
+    if use_reloader and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return False
+    return collector.start()
+
+def warm_archive(use_reloader=False):
+    """Load the historical archive in the background unless disabled via ARCHIVE_WARMUP
+
+    Requests that need the archive before it is ready wait for the same load.
+    """
+    if os.getenv('ARCHIVE_WARMUP', 'true').lower() in ('0', 'false', 'no'):
+        return None
+    if use_reloader and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return None
+    return archive.warm_up()
 
 def get_saved_weather_data():
     try:
-        saved_df = pd.read_csv('current_weather_data.csv')
-        return saved_df.tail(20).to_dict('records')
+        return read_tail(SNAPSHOT_FILE, 20).to_dict('records')
     except:
         return []
 
 def generate_forecast_from_csv(location='beluwakhan', days=5):
     """Generate forecast using historical CSV data patterns"""
-    if df.empty:
+    if archive.frame.empty:
         return generate_static_forecast(location, days)
     
     try:
@@ -396,46 +664,45 @@ def generate_forecast_from_csv(location='beluwakhan', days=5):
         current_month = current_date.month
         current_day = current_date.day
         
-        # Find historical data for similar dates (same month/day from different years)
-        historical_data = df[
-            (df['DATE(IST)'].dt.month == current_month) & 
-            (df['DATE(IST)'].dt.day.between(current_day - 3, current_day + 3))
-        ]
+        climatology = archive.climatology
         
-        if historical_data.empty:
+        # Aggregates for similar dates (within 3 days of today, any year)
+        stats = climatology.stats(current_month, current_day, days=3)
+        
+        if stats['rows'] == 0:
             # Fallback to monthly averages
-            historical_data = df[df['DATE(IST)'].dt.month == current_month]
+            stats = climatology.month_stats([current_month])
         
-        if historical_data.empty:
+        if stats['rows'] == 0:
             # Fallback to seasonal data (3-month window)
-            season_months = [(current_month - 1) % 12 + 1, current_month, (current_month % 12) + 1]
-            historical_data = df[df['DATE(IST)'].dt.month.isin(season_months)]
+            season_months = [(current_month - 2) % 12 + 1, current_month, (current_month % 12) + 1]
+            stats = climatology.month_stats(season_months)
         
-        if historical_data.empty:
+        if stats['rows'] == 0:
             return generate_static_forecast(location, days)
         
-        # Calculate base statistics with error handling
-        def safe_mean(series, default=0):
-            try:
-                return series.dropna().mean() if not series.dropna().empty else default
-            except:
-                return default
+        # Base statistics, falling back to defaults for empty columns
+        def safe_mean(col, default=0):
+            return stats['mean'][col] if stats['count'][col] > 0 else default
+        
+        def safe_std(col, default):
+            return stats['std'][col] if stats['rows'] > 1 else default
         
-        base_temp = safe_mean(historical_data['AIR_TEMP(°C)'], 15.0)
-        base_humidity = safe_mean(historical_data['HUMIDITY(%)'], 65.0)
-        base_wind = safe_mean(historical_data['WIND_SPEED(m/s)'], 2.0)
-        base_pressure = safe_mean(historical_data['ATMO_PRESSURE(hpa)'], 965.0)
+        base_temp = safe_mean('AIR_TEMP(°C)', 15.0)
+        base_humidity = safe_mean('HUMIDITY(%)', 65.0)
+        base_wind = safe_mean('WIND_SPEED(m/s)', 2.0)
+        base_pressure = safe_mean('ATMO_PRESSURE(hpa)', 965.0)
+        
+        # Realistic variation based on historical data
+        temp_std = safe_std('AIR_TEMP(°C)', 3)
+        humidity_std = safe_std('HUMIDITY(%)', 10)
+        wind_std = safe_std('WIND_SPEED(m/s)', 0.5)
         
         # Generate forecast for next 5 days
         forecast = []
         for i in range(days):
             forecast_date = current_date + timedelta(days=i+1)
             
-            # Add some realistic variation based on historical data
-            temp_std = historical_data['AIR_TEMP(°C)'].std() if len(historical_data) > 1 else 3
-            humidity_std = historical_data['HUMIDITY(%)'].std() if len(historical_data) > 1 else 10
-            wind_std = historical_data['WIND_SPEED(m/s)'].std() if len(historical_data) > 1 else 0.5
-            
             temp_variation = np.random.normal(0, min(temp_std, 5))
             humidity_variation = np.random.normal(0, min(humidity_std, 15))
             wind_variation = np.random.normal(0, min(wind_std, 1))
@@ -471,7 +738,7 @@ def generate_forecast_from_csv(location='beluwakhan', days=5):
         return forecast
         
     except Exception as e:
-        print(f"Error generating CSV forecast: {e}")
+        logger.exception("Error generating CSV forecast: %s", e)
         return generate_static_forecast(location, days)
 
 def generate_static_forecast(location='beluwakhan', days=5):
@@ -505,26 +772,12 @@ def get_hourly_today_weather(location='beluwakhan'):
         location_key = get_location_key(city_name)
         
         if location_key:
-            url = f"https://dataservice.accuweather.com/forecasts/v1/hourly/12hour/{location_key}"
-            params = {'apikey': ACCUWEATHER_API_KEY, 'details': 'true', 'metric': 'true'}
-            
-            response = requests.get(url, params=params, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                
-                hourly_data = []
-                for hour in data[:8]:  # Get next 8 hours
-                    hourly_data.append({
-                        'time': hour['DateTime'][-8:-3],  # Extract time HH:MM
-                        'temperature': round(hour['Temperature']['Value'], 1),
-                        'humidity': hour.get('RelativeHumidity', 50),
-                        'wind_speed': round(hour['Wind']['Speed']['Value'] / 3.6, 1),
-                        'conditions': hour.get('IconPhrase', 'N/A'),
-                        'cloud_cover': hour.get('CloudCover', 0)
-                    })
-                return hourly_data
+            data = fetch_accuweather(
+                'hourly', f"/forecasts/v1/hourly/12hour/{location_key}", {'details': 'true', 'metric': 'true'}, timeout=5)
+            if data:
+                return parse_hourly_forecast(data)
     except Exception as e:
-        print(f"Hourly forecast error: {e}")
+        logger.warning("Hourly forecast error: %s", e)
     
     return []
 
@@ -537,31 +790,71 @@ def get_forecast_data(location='beluwakhan'):
             location_key = get_location_key(city_name)
             
             if location_key:
-                url = f"https://dataservice.accuweather.com/forecasts/v1/daily/5day/{location_key}"
-                params = {'apikey': ACCUWEATHER_API_KEY, 'details': 'true', 'metric': 'true'}
-                
-                response = requests.get(url, params=params, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    forecast = []
-                    for day in data['DailyForecasts']:
-                        forecast.append({
-                            'date': day['Date'][:10],
-                            'min_temp': round(day['Temperature']['Minimum']['Value'], 1),
-                            'max_temp': round(day['Temperature']['Maximum']['Value'], 1),
-                            'humidity': day['Day'].get('RelativeHumidity', {}).get('Average', 50),
-                            'wind_speed': round(day['Day']['Wind']['Speed']['Value'] / 3.6, 1),
-                            'conditions': day['Day'].get('IconPhrase', 'N/A'),
-                            'cloud_cover': day['Day'].get('CloudCover', 0)
-                        })
-                    return forecast
+                data = fetch_accuweather(
+                    'daily', f"/forecasts/v1/daily/5day/{location_key}", {'details': 'true', 'metric': 'true'}, timeout=5)
+                if data:
+                    return parse_daily_forecast(data)
         except Exception as e:
-            print(f"Forecast API Error: {e}")
+            logger.warning("Forecast API error: %s", e)
     
     # Fallback to CSV-based forecast
     return generate_forecast_from_csv(location)
 
+def parse_hourly_forecast(data):
+    """Next 8 hours from an AccuWeather 12-hour forecast response"""
+    hourly_data = []
+    for hour in data[:8]:  # Get next 8 hours
+        hourly_data.append({
+            'time': hour['DateTime'][-8:-3],  # Extract time HH:MM
+            'temperature': round(hour['Temperature']['Value'], 1),
+            'humidity': hour.get('RelativeHumidity', 50),
+            'wind_speed': round(hour['Wind']['Speed']['Value'] / 3.6, 1),
+            'conditions': hour.get('IconPhrase', 'N/A'),
+            'cloud_cover': hour.get('CloudCover', 0)
+        })
+    return hourly_data
+
+def parse_daily_forecast(data):
+    """Daily entries from an AccuWeather 5-day forecast response"""
+    forecast = []
+    for day in data['DailyForecasts']:
+        forecast.append({
+            'date': day['Date'][:10],
+            'min_temp': round(day['Temperature']['Minimum']['Value'], 1),
+            'max_temp': round(day['Temperature']['Maximum']['Value'], 1),
+            'humidity': day['Day'].get('RelativeHumidity', {}).get('Average', 50),
+            'wind_speed': round(day['Day']['Wind']['Speed']['Value'] / 3.6, 1),
+            'conditions': day['Day'].get('IconPhrase', 'N/A'),
+            'cloud_cover': day['Day'].get('CloudCover', 0)
+        })
+    return forecast
+
+def score_forecast_days(forecast, pressure):
+    """Telescope predictions for each forecast day, at the current pressure"""
+    scores = score_telescope_conditions_batch(
+        [(day['min_temp'] + day['max_temp']) / 2 for day in forecast],
+        [day['humidity'] for day in forecast],
+        [day['wind_speed'] for day in forecast],
+        pressure)
+    return [{
+        'date': day['date'],
+        'score': int(score),
+        'recommendation': str(recommendation)
+    } for day, score, recommendation in zip(forecast, scores['score'], scores['recommendation'])]
+
+def score_hourly_weather(hourly_today, pressure):
+    """Telescope predictions for each hour, at the current pressure"""
+    scores = score_telescope_conditions_batch(
+        [hour['temperature'] for hour in hourly_today],
+        [hour['humidity'] for hour in hourly_today],
+        [hour['wind_speed'] for hour in hourly_today],
+        pressure)
+    return [{
+        'time': hour['time'],
+        'score': int(score),
+        'recommendation': str(recommendation)
+    } for hour, score, recommendation in zip(hourly_today, scores['score'], scores['recommendation'])]
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -569,49 +862,32 @@ def index():
 @app.route('/api/telescope-conditions')
 @app.route('/api/telescope-conditions/<location>')
 def telescope_conditions(location='beluwakhan'):
-    # Get enhanced weather data
-    weather = get_current_and_today_weather(location)
-    prediction = predict_telescope_conditions(weather)
-    past_data = get_past_data()
-    forecast = get_forecast_data(location)
-    hourly_today = get_hourly_today_weather(location)
-    historical_records = get_historical_records_for_today()
-    save_current_weather_to_csv()
-    saved_data = get_saved_weather_data()
-    
-    # Add telescope predictions for each forecast day
-    forecast_predictions = []
-    for day in forecast:
-        day_weather = {
-            'temperature': (day['min_temp'] + day['max_temp']) / 2,
-            'humidity': day['humidity'],
-            'wind_speed': day['wind_speed'],
-            'pressure': weather['pressure']
-        }
-        day_prediction = predict_telescope_conditions(day_weather)
-        forecast_predictions.append({
-            'date': day['date'],
-            'score': day_prediction['score'],
-            'recommendation': day_prediction['recommendation']
-        })
-    
-    # Add telescope predictions for hourly data
-    hourly_predictions = []
-    for hour in hourly_today:
-        hour_weather = {
-            'temperature': hour['temperature'],
-            'humidity': hour['humidity'],
-            'wind_speed': hour['wind_speed'],
-            'pressure': weather['pressure']
-        }
-        hour_prediction = predict_telescope_conditions(hour_weather)
-        hourly_predictions.append({
-            'time': hour['time'],
-            'score': hour_prediction['score'],
-            'recommendation': hour_prediction['recommendation']
-        })
+    # Independent upstream work runs in parallel under one overall deadline
+    upstream = run_concurrently(stage_executor, {
+        'weather': (timed_stage('current_weather', get_current_and_today_weather), (location,),
+                    lambda: get_simulated_weather(location)),
+        'forecast': (timed_stage('forecast', get_forecast_data), (location,),
+                     lambda: generate_forecast_from_csv(location)),
+        'hourly_today': (timed_stage('hourly', get_hourly_today_weather), (location,), list)
+    })
+    payload = build_dashboard_payload(upstream['weather'], upstream['forecast'], upstream['hourly_today'])
+    with STAGE_SECONDS.time(stage='serialize'):
+        return jsonify(payload)
+
+def build_dashboard_payload(weather, forecast, hourly_today):
+    """Combine fetched weather with scores and local history into the dashboard payload"""
+    with STAGE_SECONDS.time(stage='scoring'):
+        prediction = predict_telescope_conditions(weather)
+        forecast_predictions = score_forecast_days(forecast, weather['pressure'])
+        hourly_predictions = score_hourly_weather(hourly_today, weather['pressure'])
+    with STAGE_SECONDS.time(stage='past_data'):
+        past_data = get_past_data()
+    with STAGE_SECONDS.time(stage='historical_records'):
+        historical_records = get_historical_records_for_today()
+    with STAGE_SECONDS.time(stage='snapshot_read'):
+        saved_weather_data = get_saved_weather_data()
     
-    return jsonify({
+    return {
         'weather': weather,
         'prediction': prediction,
         'past_data': past_data,
@@ -620,11 +896,278 @@ def telescope_conditions(location='beluwakhan'):
         'hourly_today': hourly_today,
         'hourly_predictions': hourly_predictions,
         'historical_records': historical_records,
-        'saved_weather_data': saved_data,
+        'saved_weather_data': saved_weather_data,
         'locations': list(LOCATIONS.keys()),
         'timestamp': datetime.now().isoformat()
+    }
+
+# Dashboard resources are built at most once per TTL and shared by all clients
+resource_cache = ResponseCache(max_entries=64)
+resource_builds = SingleFlight()
+
+def cached_resource(key, ttl, build):
+    """Return the cache entry for a dashboard resource, building it when expired
+
+    `ttl` is either seconds or a function of the built value.
+    """
+    entry = resource_cache.get(key)
+    if entry is None:
+        def build_and_store():
+            cached = resource_cache.get(key)
+            if cached is not None:
+                return cached
+            value = build()
+            return resource_cache.set(key, value, ttl(value) if callable(ttl) else ttl)
+        entry = resource_builds.do(key, build_and_store)
+    return entry
+
+def conditional_json(etag, last_modified, cache_control, build):
+    """JSON response that honours If-None-Match / If-Modified-Since
+
+    build() is called, and its result serialized, only when the client's
+    copy is out of date; otherwise a bodyless 304 is returned.
+    """
+    last_modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        since = request.if_modified_since
+        not_modified = since is not None and last_modified <= since
+    
+    response = Response(status=304) if not_modified else jsonify(build())
+    response.set_etag(etag)
+    response.headers['Last-Modified'] = http_date(last_modified)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def resource_location(location):
+    return location if location in LOCATIONS else 'beluwakhan'
+
+# Built from stale or fallback data, a resource is rebuilt soon to pick up the refresh
+STALE_RESOURCE_TTL = 30
+
+def current_resource_ttl(value):
+    return STALE_RESOURCE_TTL if value['weather'].get('stale') else ACCUWEATHER_TTLS['current']
+
+def fetch_resource_data(fetch, location, fallback):
+    """fetch(location) under the upstream deadline; (data, True) from fallback(location) if it fails
+
+    A resource built from fallback data is only cached for STALE_RESOURCE_TTL.
+    """
+    fell_back = []
+    def use_fallback():
+        fell_back.append(True)
+        return fallback(location)
+    data = run_concurrently(upstream_executor, {fetch.__name__: (fetch, (location,), use_fallback)})
+    return data[fetch.__name__], bool(fell_back)
+
+def current_resource(location):
+    fell_back = False
+    def build():
+        nonlocal fell_back
+        weather, fell_back = fetch_resource_data(get_current_and_today_weather, location, get_simulated_weather)
+        return publish_conditions(location, weather, store=False)
+    def ttl(value):
+        return STALE_RESOURCE_TTL if fell_back else current_resource_ttl(value)
+    return cached_resource(('current', location), ttl, build)
+
+# Current conditions per location, pushed to streaming dashboards when they change
+SSE_HEARTBEAT = int(os.getenv('SSE_HEARTBEAT', 15))
+
+def refresh_conditions(location):
+    """Rebuild the location's current conditions once their TTL has lapsed
+
+    The rebuild publishes any change to conditions_feed, so streams stay
+    current without an in-process collector (e.g. next to run_collector.py).
+    """
+    try:
+        current_resource(location)
+    except Exception as e:
+        logger.warning("Refreshing conditions for %s failed: %s", location, e)
+
+def conditions_fingerprint(value):
+    """What counts as a change: the observation itself, not the time it was fetched"""
+    weather = {key: v for key, v in value['weather'].items()
+               if key not in ('current_time', 'data_age_seconds')}
+    return repr(sorted(weather.items()))
+
+conditions_feed = UpdateFeed(fingerprint=conditions_fingerprint)
+
+def publish_conditions(location, weather, store=True):
+    """Share freshly fetched conditions with the current resource and the stream"""
+    value = {'weather': weather, 'prediction': predict_telescope_conditions(weather)}
+    if store:
+        resource_cache.set(('current', location), value, current_resource_ttl(value))
+    conditions_feed.publish(location, value)
+    return value
+
+def resource_pressure(location):
+    """Pressure for scoring forecasts, from the cached current conditions; (pressure, True) if not cached"""
+    entry = resource_cache.get_stale(('current', location))
+    if entry is not None:
+        return entry.value['weather']['pressure'], False
+    return get_simulated_weather(location)['pressure'], True
+
+def forecast_resource(location):
+    provisional = False
+    def build():
+        nonlocal provisional
+        forecast, fell_back = fetch_resource_data(get_forecast_data, location, generate_forecast_from_csv)
+        pressure, estimated = resource_pressure(location)
+        provisional = fell_back or estimated
+        return {'forecast': forecast, 'forecast_predictions': score_forecast_days(forecast, pressure)}
+    def ttl(value):
+        return STALE_RESOURCE_TTL if provisional else ACCUWEATHER_TTLS['daily']
+    return cached_resource(('forecast', location), ttl, build)
+
+def hourly_resource(location):
+    provisional = False
+    def build():
+        nonlocal provisional
+        hourly_today, fell_back = fetch_resource_data(get_hourly_today_weather, location, lambda key: [])
+        pressure, estimated = resource_pressure(location)
+        provisional = fell_back or estimated
+        return {'hourly_today': hourly_today, 'hourly_predictions': score_hourly_weather(hourly_today, pressure)}
+    def ttl(value):
+        return STALE_RESOURCE_TTL if provisional else ACCUWEATHER_TTLS['hourly']
+    return cached_resource(('hourly', location), ttl, build)
+
+def cached_entry_response(name, location, entry):
+    max_age = max(0, int(entry.expires_at - time.time()))
+    return conditional_json(
+        f"{name}-{location}-{int(entry.stored_at * 1000)}", entry.stored_at,
+        f'public, max-age={max_age}', lambda: entry.value)
+
+@app.route('/api/locations/<location>/current')
+def location_current(location):
+    location = resource_location(location)
+    return cached_entry_response('current', location, current_resource(location))
+
+@app.route('/api/locations/<location>/forecast')
+def location_forecast(location):
+    location = resource_location(location)
+    return cached_entry_response('forecast', location, forecast_resource(location))
+
+@app.route('/api/locations/<location>/hourly')
+def location_hourly(location):
+    location = resource_location(location)
+    return cached_entry_response('hourly', location, hourly_resource(location))
+
+@app.route('/api/stream')
+@app.route('/api/stream/<location>')
+def stream_conditions(location='beluwakhan'):
+    """Server-Sent Events: a 'conditions' event whenever a location's conditions change"""
+    location = resource_location(location)
+    if not conditions_feed.latest(location)[0]:
+        conditions_feed.publish(location, current_resource(location).value)
+    last_version = parse_event_id(request.headers.get('Last-Event-ID'))
+    
+    def events():
+        yield 'retry: 5000\n\n'
+        for update in conditions_feed.subscribe(location, last_version, heartbeat=SSE_HEARTBEAT):
+            if update is None:
+                # Publishes here if the refresh brought a change; delivered on the next wait
+                refresh_conditions(location)
+                yield ': keepalive\n\n'
+                continue
+            version, value = update
+            yield format_event('conditions', app.json.dumps(value), version)
+    
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+CONDITIONS_INCLUDES = {'forecast': forecast_resource, 'hourly': hourly_resource}
+
+def parse_location_list(value):
+    """Location keys from a comma-separated list (all locations if empty), deduplicated"""
+    keys = [key.strip().lower() for key in (value or '').split(',') if key.strip()]
+    unknown = [key for key in keys if key not in LOCATIONS]
+    if unknown:
+        raise ValueError(f"Unknown location(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(keys)) or list(LOCATIONS.keys())
+
+def fallback_resource(name, location):
+    """Uncached stand-in for a resource whose fetch failed or timed out"""
+    weather = get_simulated_weather(location)
+    if name == 'current':
+        return {'weather': weather, 'prediction': predict_telescope_conditions(weather)}
+    if name == 'forecast':
+        forecast = generate_forecast_from_csv(location)
+        return {'forecast': forecast, 'forecast_predictions': score_forecast_days(forecast, weather['pressure'])}
+    return {'hourly_today': [], 'hourly_predictions': []}
+
+@app.route('/api/conditions')
+def batch_conditions():
+    """Current conditions (and optionally forecast/hourly) for several locations at once
+
+    ?locations=nainital,delhi picks the sites (default: all) and
+    ?include=forecast,hourly adds those resources. Every site and resource
+    goes through the same shared cache as the single-location endpoints.
+    """
+    try:
+        locations = parse_location_list(request.args.get('locations'))
+        include = [name.strip() for name in request.args.get('include', '').split(',') if name.strip()]
+        unknown = [name for name in include if name not in CONDITIONS_INCLUDES]
+        if unknown:
+            raise ValueError(f"Unknown include(s): {', '.join(unknown)}")
+    except ValueError as e:
+        return jsonify({'error': str(e), 'locations': list(LOCATIONS.keys()),
+                        'include': list(CONDITIONS_INCLUDES.keys())}), 400
+    
+    resolve_location_keys([LOCATIONS[location]['name'] for location in locations])
+    
+    # Current conditions first: forecast and hourly scoring reuse their pressure.
+    # Resources fetch on the upstream pool themselves, so they are built on the stage pool.
+    # All passes share one deadline, so the batch takes at most UPSTREAM_DEADLINE in total
+    builders = {'current': current_resource}
+    builders.update((name, CONDITIONS_INCLUDES[name]) for name in include)
+    results = {location: {} for location in locations}
+    deadline_at = time.monotonic() + UPSTREAM_DEADLINE
+    for name, build in builders.items():
+        fetched = run_concurrently(stage_executor, {
+            location: (lambda key: build(key).value, (location,), lambda key=location: fallback_resource(name, key))
+            for location in locations
+        }, deadline=max(0, deadline_at - time.monotonic()))
+        for location, value in fetched.items():
+            results[location].update(value)
+    
+    ranking = sorted((
+        {'location': location, 'name': LOCATIONS[location]['name'],
+         'score': results[location]['prediction']['score'],
+         'recommendation': results[location]['prediction']['recommendation']}
+        for location in locations), key=lambda site: site['score'], reverse=True)
+    
+    return jsonify({
+        'locations': results,
+        'ranking': ranking,
+        'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/history/summary')
+def history_summary():
+    """Historical summary and records for today's date; changes daily or on reload"""
+    today = datetime.now().date()
+    version = archive.ensure_loaded()
+    loaded_at = archive.loaded_at.timestamp() if archive.loaded_at else 0
+    # Today's records change at midnight even when the archive does not
+    last_modified = max(loaded_at, datetime.combine(today, datetime.min.time()).timestamp())
+    return conditional_json(
+        f"history-{version}-{today.isoformat()}", last_modified, 'public, max-age=3600',
+        lambda: {'past_data': get_past_data(), 'historical_records': get_historical_records_for_today()})
+
+@app.route('/api/snapshots')
+def snapshots():
+    """Most recent saved snapshots; revalidated on every use"""
+    try:
+        stat = os.stat(SNAPSHOT_FILE)
+        etag, modified = f"snapshots-{stat.st_size}-{stat.st_mtime_ns}", stat.st_mtime
+    except FileNotFoundError:
+        etag, modified = 'snapshots-none', 0
+    return conditional_json(etag, modified, 'no-cache',
+                            lambda: {'saved_weather_data': get_saved_weather_data()})
+
 @app.route('/requirements')
 def requirements():
     return jsonify({
@@ -674,18 +1217,96 @@ def requirements():
             'Multi-location Support (4 cities)',
             'CSV Data Export and Storage',
             'Responsive Design with Space Theme',
-            'Auto-refresh every 5 minutes'
+            'Live conditions pushed over Server-Sent Events',
+            'Forecast, hourly and history panels re-checked every 15 minutes'
         ]
     })
 
+# Rows read from the snapshot file per chunk when streaming an export
+EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', 50000))
+
+def parse_export_timestamp(value):
+    """Timestamp comparable with the snapshot datetimes, which are naive local time
+
+    Values with a UTC offset (e.g. 2025-11-12T00:00:00Z) are converted to local time.
+    """
+    timestamp = pd.Timestamp(value)
+    if timestamp is pd.NaT:
+        raise ValueError(f"not a date: {value}")
+    if timestamp.tzinfo is not None:
+        timestamp = pd.Timestamp(timestamp.to_pydatetime().astimezone()).tz_localize(None)
+    return timestamp
+
+def parse_export_filters(args):
+    """Read the start/end/location export filters (both ends inclusive)
+
+    Raises ValueError on dates that cannot be parsed.
+    """
+    start = parse_export_timestamp(args['start']) if args.get('start') else None
+    end = parse_export_timestamp(args['end']) if args.get('end') else None
+    if end is not None and len(args['end']) <= 10:
+        end += pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')  # a bare date includes that whole day
+    
+    locations = None
+    if args.get('location'):
+        locations = {LOCATIONS.get(name.strip().lower(), {}).get('name', name.strip()).lower()
+                     for name in args['location'].split(',')}
+    return start, end, locations
+
+def score_export_chunks(chunks, start=None, end=None, locations=None):
+    """Filter snapshot chunks and add the telescope_score column to each"""
+    for chunk in chunks:
+        if start is not None or end is not None:
+            times = pd.to_datetime(chunk['datetime'], errors='coerce')
+            keep = pd.Series(True, index=chunk.index)
+            if start is not None:
+                keep &= times >= start
+            if end is not None:
+                keep &= times <= end
+            chunk = chunk[keep]
+        if locations is not None:
+            chunk = chunk[chunk['location'].str.lower().isin(locations)]
+        
+        chunk = chunk.copy()
+        chunk['telescope_score'] = score_telescope_conditions_batch(
+            *(pd.to_numeric(chunk[col], errors='coerce')
+              for col in ('temperature', 'humidity', 'wind_speed', 'pressure')))['score']
+        yield chunk
+
+def stream_csv(chunks):
+    """Yield CSV bytes chunk by chunk, with the header only once"""
+    header = True
+    for chunk in chunks:
+        if chunk.empty and not header:
+            continue
+        yield chunk.to_csv(index=False, header=header).encode('utf-8')
+        header = False
+
+def gzip_stream(parts):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    for part in parts:
+        data = compressor.compress(part)
+        if data:
+            yield data
+    yield compressor.flush()
+
 @app.route('/export/weather-data')
 def export_weather_data():
-    """Export weather data as CSV with enhanced data"""
+    """Stream saved weather data as CSV with telescope scores
+
+    Optional query parameters: start and end (dates or datetimes) and
+    location (one or more names, comma separated). The response is
+    gzip-encoded when the client accepts it.
+    """
     try:
-        # Try to read saved data first
-        try:
-            saved_df = pd.read_csv('current_weather_data.csv')
-        except FileNotFoundError:
+        start, end, locations = parse_export_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid export filter: {str(e)}'}), 400
+    
+    try:
+        if os.path.exists(SNAPSHOT_FILE):
+            chunks = pd.read_csv(SNAPSHOT_FILE, chunksize=EXPORT_CHUNK_ROWS)
+        else:
             # Generate sample data if no saved data exists
             sample_data = []
             for location in LOCATIONS.keys():
@@ -700,38 +1321,32 @@ def export_weather_data():
                     'visibility': weather['visibility'],
                     'cloud_cover': weather['cloud_cover']
                 })
-            saved_df = pd.DataFrame(sample_data)
+            chunks = [pd.DataFrame(sample_data)]
         
-        # Add telescope viewing scores
-        saved_df['telescope_score'] = saved_df.apply(lambda row: predict_telescope_conditions({
-            'temperature': row['temperature'],
-            'humidity': row['humidity'],
-            'wind_speed': row['wind_speed'],
-            'pressure': row['pressure']
-        })['score'], axis=1)
+        body = stream_csv(score_export_chunks(chunks, start, end, locations))
+        headers = {'Content-Disposition': f'attachment; filename=telescope_weather_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'}
         
-        csv_data = saved_df.to_csv(index=False)
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            body = gzip_stream(body)
+            headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
         
-        return Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': f'attachment; filename=telescope_weather_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'}
-        )
+        return Response(body, mimetype='text/csv', headers=headers)
     except Exception as e:
         return jsonify({'error': f'Export failed: {str(e)}'}), 500
 
 @app.route('/api/export-stats')
 def export_stats():
     try:
-        saved_df = pd.read_csv('current_weather_data.csv')
+        manifest = read_manifest(SNAPSHOT_FILE)
         return jsonify({
-            'total_records': len(saved_df),
+            'total_records': manifest['rows'],
             'date_range': {
-                'first_record': saved_df['datetime'].iloc[0],
-                'last_record': saved_df['datetime'].iloc[-1]
+                'first_record': manifest['first_datetime'],
+                'last_record': manifest['last_datetime']
             },
-            'locations_covered': saved_df['location'].unique().tolist(),
-            'file_size_kb': round(os.path.getsize('current_weather_data.csv') / 1024, 2),
+            'locations_covered': manifest['locations'],
+            'file_size_kb': round(manifest['size'] / 1024, 2),
             'export_url': '/export/weather-data'
         })
     except FileNotFoundError:
@@ -741,5 +1356,166 @@ def export_stats():
             'export_url': None
         })
 
+@app.route('/api/history/breakdown')
+@app.route('/api/history/breakdown/<by>')
+def history_breakdown(by='year'):
+    """Historical summary per year or per calendar month"""
+    if by not in ('year', 'month'):
+        return jsonify({'error': "Breakdown must be 'year' or 'month'"}), 400
+    if archive.frame.empty:
+        return jsonify({'by': by, 'data_version': archive.version, 'periods': []})
+    
+    try:
+        return jsonify({'by': by, 'data_version': archive.version, 'periods': archive.breakdown(by)})
+    except Exception as e:
+        return jsonify({'error': f'Breakdown failed: {str(e)}'}), 500
+
+@app.route('/api/upstream-status')
+def upstream_status():
+    return jsonify({
+        'response_cache': response_cache.stats(),
+        'call_budget': call_budget.stats(),
+        'collector': collector.status(),
+        'archive': archive.status(),
+        'conditions_feed': conditions_feed.stats(),
+        'location_keys': location_keys.stats() if location_keys is not None else None,
+        'circuit_breakers': {family: breaker.status() for family, breaker in circuit_breakers.items()},
+        'ttl_seconds': ACCUWEATHER_TTLS,
+        'max_staleness_seconds': MAX_STALENESS
+    })
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                route=route, method=request.method, status=response.status_code)
+    return response
+
+def cache_samples(stat):
+    caches = {'upstream': response_cache, 'resource': resource_cache}
+    return [({'cache': name}, cache.stats()[stat]) for name, cache in caches.items()]
+
+CIRCUIT_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+metrics.counter_callback('telescope_cache_hits_total', 'Cache lookups that found a fresh entry',
+                         lambda: cache_samples('hits'))
+metrics.counter_callback('telescope_cache_misses_total', 'Cache lookups without a fresh entry',
+                         lambda: cache_samples('misses'))
+metrics.counter_callback('telescope_cache_stale_hits_total', 'Expired entries served while refreshing',
+                         lambda: cache_samples('stale_hits'))
+metrics.gauge_callback('telescope_cache_hit_ratio', 'Fresh hits over all lookups',
+                       lambda: cache_samples('hit_ratio'))
+metrics.gauge_callback('telescope_cache_entries', 'Entries currently cached',
+                       lambda: cache_samples('entries'))
+metrics.gauge_callback('telescope_upstream_budget_remaining', "AccuWeather calls left in today's budget",
+                       lambda: call_budget.stats()['remaining'])
+metrics.counter_callback('telescope_upstream_budget_rejected_total', 'Calls refused because the budget was spent',
+                         lambda: call_budget.stats()['rejected'])
+metrics.gauge_callback('telescope_circuit_state', 'Circuit breaker state (0 closed, 1 half-open, 2 open)',
+                       lambda: [({'family': family}, CIRCUIT_STATE_VALUES[breaker.status()['state']])
+                                for family, breaker in circuit_breakers.items()])
+metrics.counter_callback('telescope_collector_runs_total', 'Snapshot collection runs',
+                         lambda: collector.status()['runs'])
+metrics.counter_callback('telescope_collector_failures_total', 'Failed snapshot collection runs',
+                         lambda: collector.status()['failures'])
+metrics.gauge_callback('telescope_archive_bytes', 'Resident size of the historical archive frame',
+                       lambda: archive.status()['memory_bytes'])
+metrics.gauge_callback('telescope_stream_subscribers', 'Open /api/stream connections',
+                       lambda: conditions_feed.stats()['subscribers'])
+
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+def admin_authorized():
+    """True when the request carries the configured ADMIN_TOKEN in X-Admin-Token"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.route('/api/admin/logging', methods=['GET', 'POST'])
+def admin_logging():
+    """Show or change the log level and upstream tracing, e.g. {"upstream_tracing": true}"""
+    if not admin_authorized():
+        return jsonify({'error': 'Admin token required'}), 403
+    
+    if request.method == 'POST':
+        settings = request.get_json(silent=True) or {}
+        try:
+            if 'level' in settings:
+                set_level(settings['level'])
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid level: {e}'}), 400
+        if 'upstream_tracing' in settings:
+            set_upstream_tracing(bool(settings['upstream_tracing']))
+        logger.info("Logging changed: %s", settings)
+    
+    return jsonify({
+        'level': logging.getLevelName(logging.getLogger().level),
+        'upstream_tracing': upstream_tracing_enabled()
+    })
+
+# Opt-in per-request profiling: X-Profile: 1 header or ?profile=1, with the admin
+# token or PROFILING_ENABLED; at most one profile every PROFILE_MIN_INTERVAL seconds
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+request_profiler = RequestProfiler(
+    min_interval=float(os.getenv('PROFILE_MIN_INTERVAL', 30)),
+    keep=int(os.getenv('PROFILE_KEEP', 20)))
+
+def profiling_authorized():
+    """May this request ask to be profiled? Reading profiles always needs the admin token"""
+    return PROFILING_ENABLED or admin_authorized()
+
+@app.before_request
+def start_profile():
+    wanted = request.headers.get('X-Profile') or request.args.get('profile')
+    if wanted and wanted.lower() not in ('0', 'false', 'no') and profiling_authorized():
+        session = request_profiler.start(f"{request.method} {request.full_path.rstrip('?')}")
+        if session is not None:
+            g.profile_session = session
+
+@app.after_request
+def finish_profile(response):
+    session = g.pop('profile_session', None)
+    if session is not None:
+        summary = request_profiler.finish(session)
+        response.headers['X-Profile-Id'] = str(summary['id'])
+        logger.info("Profiled %s in %.3fs as profile %s", summary['request'],
+                    summary['duration_seconds'], summary['id'])
+    return response
+
+@app.teardown_request
+def discard_profile(error=None):
+    # after_request is skipped when the handler raised; still stop the profiler
+    session = g.pop('profile_session', None)
+    if session is not None:
+        request_profiler.finish(session)
+
+@app.route('/api/admin/profiles')
+def admin_profiles():
+    """Recent request profiles, newest first"""
+    if not admin_authorized():
+        return jsonify({'error': 'Admin token required'}), 403
+    return jsonify({'profiler': request_profiler.stats(), 'profiles': request_profiler.recent()})
+
+@app.route('/api/admin/profiles/<int:profile_id>')
+def admin_profile(profile_id):
+    """Top functions of one stored profile"""
+    if not admin_authorized():
+        return jsonify({'error': 'Admin token required'}), 403
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        return jsonify({'error': f'No stored profile {profile_id}'}), 404
+    return jsonify(profile)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
+    warm_archive(use_reloader=True)
+    start_collector(use_reloader=True)
     app.run(debug=True)
\ No newline at end of file
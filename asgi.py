@@ -0,0 +1,379 @@
+"""
+ASGI entry point for the Telescope Weather App.
+
+    uvicorn asgi:application --host 127.0.0.1 --port 5000
+
+The dashboard endpoint (/api/telescope-conditions[/<location>]) is served
+natively on the event loop: its AccuWeather calls go through an async
+httpx client, so one process can hold hundreds of dashboard requests
+while upstream calls are in flight.  The /api/stream SSE endpoint is also
+served natively, so an open dashboard costs a coroutine rather than a
+worker thread.  Every other route is handed to the Flask app through
+asgiref's WSGI adapter.
+
+The response cache, call budget and response parsing are shared with the
+Flask app.  Requires the optional dependencies in requirements-async.txt.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import re
+import time
+
+try:
+    import httpx
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError as e:
+    raise ImportError(
+        "The ASGI serving mode needs the optional async dependencies: "
+        "pip install -r requirements-async.txt") from e
+
+import app as telescope_app
+from update_feed import format_event, parse_event_id
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_PATH = re.compile(r'/api/telescope-conditions(?:/([^/]+))?/?')
+STREAM_PATH = re.compile(r'/api/stream(?:/([^/]+))?/?')
+STREAM_POLL_INTERVAL = 1.0
+
+
+class AsyncAccuWeather:
+    """Async counterpart of app.fetch_accuweather()"""
+
+    def __init__(self, max_retries=2, per_host_limit=4):
+        self.max_retries = max_retries
+        self.per_host_limit = per_host_limit
+        self._client = None
+        self._inflight = {}
+
+    @property
+    def client(self):
+        # Created lazily so it binds to the running event loop
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.per_host_limit,
+                                  max_keepalive_connections=self.per_host_limit)
+            self._client = httpx.AsyncClient(limits=limits)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch_entry(self, endpoint, path, params=None, timeout=10):
+        """Async version of app.fetch_accuweather_entry() (stale-while-revalidate)"""
+        params = params or {}
+        cache_key = telescope_app.accuweather_cache_key(path, params)
+
+        cached = telescope_app.response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Concurrent misses for the same resource share one upstream call
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._request(endpoint, path, params, timeout, cache_key))
+            self._inflight[cache_key] = task
+            task.add_done_callback(self._refresh_done(cache_key))
+
+        stale = telescope_app.response_cache.get_stale(cache_key)
+        if stale is not None:
+            return stale  # the task above refreshes it in the background
+        return await asyncio.shield(task)
+
+    def _refresh_done(self, cache_key):
+        def done(task):
+            self._inflight.pop(cache_key, None)
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning("AccuWeather fetch of %s failed: %s", cache_key[0], task.exception())
+        return done
+
+    async def fetch(self, endpoint, path, params=None, timeout=10):
+        """Fetch JSON through the shared cache; None on failure or spent budget"""
+        entry = await self.fetch_entry(endpoint, path, params, timeout)
+        return entry.value if entry is not None else None
+
+    async def _request(self, endpoint, path, params, timeout, cache_key):
+        if not telescope_app.acquire_upstream_call(endpoint, path):
+            return None
+
+        url = f"{telescope_app.ACCUWEATHER_BASE_URL}{path}"
+        query = dict(params, apikey=telescope_app.ACCUWEATHER_API_KEY)
+        retry_policy = telescope_app.http_client
+        started = time.perf_counter()
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = await self.client.get(url, params=query, timeout=timeout)
+            except httpx.TransportError as e:
+                if last_attempt or not telescope_app.charge_retry(path):
+                    telescope_app.UPSTREAM_SECONDS.observe(
+                        time.perf_counter() - started, endpoint=endpoint, status='error')
+                    breaker = telescope_app.circuit_breakers[telescope_app.ENDPOINT_FAMILIES[endpoint]]
+                    breaker.record_failure(telescope_app.upstream_error(e))
+                    raise
+                await asyncio.sleep(retry_policy.backoff_delay(attempt))
+                continue
+
+            if (response.status_code not in retry_policy.retry_statuses or last_attempt
+                    or not telescope_app.charge_retry(path)):
+                break
+            await asyncio.sleep(retry_policy.backoff_delay(attempt, response))
+
+        telescope_app.UPSTREAM_SECONDS.observe(
+            time.perf_counter() - started, endpoint=endpoint, status=response.status_code)
+        return telescope_app.handle_accuweather_response(endpoint, path, cache_key, response)
+
+
+accuweather = AsyncAccuWeather(
+    max_retries=int(os.getenv('HTTP_MAX_RETRIES', 2)),
+    per_host_limit=int(os.getenv('HTTP_PER_HOST_LIMIT', 4))
+)
+
+
+def _city_name(location):
+    return telescope_app.LOCATIONS.get(location, telescope_app.LOCATIONS['beluwakhan'])['name']
+
+
+async def search_location_key_async(city_name):
+    """Async version of app.search_location_key()"""
+    data = await accuweather.fetch('locations', '/locations/v1/cities/search', {'q': city_name})
+    if data is None:
+        raise LookupError(f"Location search unavailable for {city_name}")
+    return data[0]['Key'] if data else None
+
+
+async def get_location_key_async(city_name):
+    """Async version of app.get_location_key(): the store's own lookup and put, with an async search"""
+    if not telescope_app.ACCUWEATHER_API_KEY:
+        return None
+
+    try:
+        # The store reads and writes SQLite (and is opened on first use), so it is used from a worker thread
+        store = await asyncio.to_thread(telescope_app.get_location_store)
+        known, key = await asyncio.to_thread(store.lookup, city_name)
+        if known:
+            return key
+        key = await search_location_key_async(city_name)
+        await asyncio.to_thread(store.put, city_name, key)
+        return key
+    except Exception as e:
+        logger.warning("Location search error: %s", e)
+    return None
+
+
+async def get_current_and_today_weather_async(location='beluwakhan'):
+    """Async version of app.get_current_and_today_weather()"""
+    if telescope_app.ACCUWEATHER_API_KEY:
+        city_name = _city_name(location)
+        try:
+            location_key = await get_location_key_async(city_name)
+            if location_key:
+                current_entry, today_response = await asyncio.gather(
+                    accuweather.fetch_entry('current', f"/currentconditions/v1/{location_key}", {'details': 'true'}),
+                    accuweather.fetch('daily', f"/forecasts/v1/daily/1day/{location_key}",
+                                      {'details': 'true', 'metric': 'true'}))
+                if current_entry is not None and current_entry.value:
+                    weather = telescope_app.parse_current_weather(city_name, current_entry.value, today_response)
+                    weather.update(telescope_app.data_freshness(current_entry))
+                    return weather
+                logger.warning("No current conditions for %s, using fallback", city_name)
+        except Exception:
+            logger.exception("Current weather for %s failed", location)
+
+    return telescope_app.get_simulated_weather(location)
+
+
+async def get_forecast_data_async(location='beluwakhan'):
+    """Async version of app.get_forecast_data()"""
+    if telescope_app.ACCUWEATHER_API_KEY:
+        try:
+            location_key = await get_location_key_async(_city_name(location))
+            if location_key:
+                data = await accuweather.fetch('daily', f"/forecasts/v1/daily/5day/{location_key}",
+                                               {'details': 'true', 'metric': 'true'}, timeout=5)
+                if data:
+                    return telescope_app.parse_daily_forecast(data)
+        except Exception as e:
+            logger.warning("Forecast API error: %s", e)
+
+    # Can wait for the archive load or build its index, so never on the loop
+    return await asyncio.to_thread(telescope_app.generate_forecast_from_csv, location)
+
+
+async def get_hourly_today_weather_async(location='beluwakhan'):
+    """Async version of app.get_hourly_today_weather()"""
+    if not telescope_app.ACCUWEATHER_API_KEY:
+        return []
+
+    try:
+        location_key = await get_location_key_async(_city_name(location))
+        if location_key:
+            data = await accuweather.fetch('hourly', f"/forecasts/v1/hourly/12hour/{location_key}",
+                                           {'details': 'true', 'metric': 'true'}, timeout=5)
+            if data:
+                return telescope_app.parse_hourly_forecast(data)
+    except Exception as e:
+        logger.warning("Hourly forecast error: %s", e)
+    return []
+
+
+async def run_concurrently_async(tasks, deadline=None):
+    """Async counterpart of app.run_concurrently(); tasks map name -> (coroutine, fallback)
+
+    A fallback may return an awaitable, which is awaited for the result.
+    """
+    deadline = telescope_app.UPSTREAM_DEADLINE if deadline is None else deadline
+    futures = {name: asyncio.ensure_future(coro) for name, (coro, _) in tasks.items()}
+    await asyncio.wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for name, future in futures.items():
+        if future.done() and future.exception() is None:
+            results[name] = future.result()
+            continue
+        if not future.done():
+            future.cancel()
+            logger.warning("%s missed the %ss deadline, using fallback", name, deadline)
+        else:
+            logger.warning("%s failed: %s", name, future.exception())
+        result = tasks[name][1]()
+        results[name] = await result if inspect.isawaitable(result) else result
+    return results
+
+
+async def timed_stage_async(stage, coro):
+    """Await coro, recording its duration like app.timed_stage()"""
+    with telescope_app.STAGE_SECONDS.time(stage=stage):
+        return await coro
+
+
+async def dashboard_payload(location='beluwakhan'):
+    """The /api/telescope-conditions payload, fetched without blocking the loop"""
+    upstream = await run_concurrently_async({
+        'weather': (timed_stage_async('current_weather', get_current_and_today_weather_async(location)),
+                    lambda: telescope_app.get_simulated_weather(location)),
+        'forecast': (timed_stage_async('forecast', get_forecast_data_async(location)),
+                     lambda: asyncio.to_thread(telescope_app.generate_forecast_from_csv, location)),
+        'hourly_today': (timed_stage_async('hourly', get_hourly_today_weather_async(location)), list)
+    })
+    # History lookups and the snapshot tail read touch disk, so keep them off the loop
+    return await asyncio.to_thread(
+        telescope_app.build_dashboard_payload,
+        upstream['weather'], upstream['forecast'], upstream['hourly_today'])
+
+
+class TelescopeASGI:
+    """Serves the dashboard endpoint natively and everything else via Flask"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = DASHBOARD_PATH.fullmatch(scope['path'])
+            if match:
+                await self.dashboard(match.group(1) or 'beluwakhan', send)
+                return
+            match = STREAM_PATH.fullmatch(scope['path'])
+            if match:
+                await self.stream(match.group(1) or 'beluwakhan', scope, receive, send)
+                return
+
+        await self.wsgi(scope, receive, send)
+
+    async def dashboard(self, location, send):
+        started = time.perf_counter()
+        payload = await dashboard_payload(location)
+        with telescope_app.STAGE_SECONDS.time(stage='serialize'):
+            body = (self.flask_app.json.dumps(payload) + '\n').encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+        telescope_app.REQUEST_SECONDS.observe(
+            time.perf_counter() - started, route='/api/telescope-conditions/<location>', method='GET', status=200)
+
+    async def stream(self, location, scope, receive, send):
+        """Async counterpart of app.stream_conditions()
+
+        Checking the feed's version is a dict lookup, so each connection
+        polls it instead of parking a thread on the feed's condition.
+        """
+        location = telescope_app.resource_location(location)
+        feed = telescope_app.conditions_feed
+        if not feed.latest(location)[0]:
+            value = (await asyncio.to_thread(telescope_app.current_resource, location)).value
+            feed.publish(location, value)
+        headers = dict(scope['headers'])
+        last_version = parse_event_id(headers.get(b'last-event-id', b'').decode('latin-1'))
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/event-stream; charset=utf-8'),
+                        (b'cache-control', b'no-cache'),
+                        (b'x-accel-buffering', b'no')]
+        })
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            await self._send_text(send, 'retry: 5000\n\n')
+            idle = 0.0
+            while not disconnected.done():
+                version, value = feed.latest(location)
+                if version > last_version:
+                    last_version, idle = version, 0.0
+                    await self._send_text(send, format_event(
+                        'conditions', self.flask_app.json.dumps(value), version))
+                elif idle >= telescope_app.SSE_HEARTBEAT:
+                    idle = 0.0
+                    await asyncio.to_thread(telescope_app.refresh_conditions, location)
+                    await self._send_text(send, ': keepalive\n\n')
+                await asyncio.wait([disconnected], timeout=STREAM_POLL_INTERVAL)
+                idle += STREAM_POLL_INTERVAL
+        finally:
+            disconnected.cancel()
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    async def _wait_for_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    async def _send_text(send, text):
+        await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                telescope_app.warm_archive()
+                telescope_app.start_collector()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                telescope_app.collector.stop(timeout=5)
+                await accuweather.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = TelescopeASGI(telescope_app.app)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(application, host=os.getenv('HOST', '127.0.0.1'), port=int(os.getenv('PORT', 5000)))
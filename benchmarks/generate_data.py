@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Synthetic data for the benchmarks.
+
+Writes ISRO-format historical archives (hourly readings from several
+stations, with the archive's mix of date formats) and
+current_weather_data.csv snapshot files of any size.  Values follow a
+seasonal and daily cycle so the scoring and climatology code paths see
+realistic data.
+
+    python benchmarks/generate_data.py archive 1000000 --stations 4 -o archive.csv
+    python benchmarks/generate_data.py snapshots 100000 -o snapshots.csv
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot_store import SNAPSHOT_COLUMNS  # noqa: E402
+
+ARCHIVE_COLUMNS = ['SID', 'DATE(IST)', 'TIME(IST)', 'AIR_TEMP(°C)', 'HUMIDITY(%)',
+                   'WIND_SPEED(m/s)', 'ATMO_PRESSURE(hpa)']
+ARCHIVE_START = '2012-11-02'
+SNAPSHOT_LOCATIONS = ['Beluwakhan', 'Nainital', 'Delhi', 'Mumbai']
+CHUNK_ROWS = 500_000
+
+
+def _format_dates(timestamps, formats, rng):
+    """Date strings in a random mix of formats; each distinct day is formatted once"""
+    days = timestamps.normalize()
+    codes, uniques = pd.factorize(days)
+    choice = rng.integers(0, len(formats), size=len(uniques))
+    labels = np.empty(len(uniques), dtype=object)
+    for i, fmt in enumerate(formats):
+        picked = choice == i
+        labels[picked] = uniques[picked].strftime(fmt)
+    return labels[codes]
+
+
+def archive_chunk(start_row, rows, stations, rng):
+    """Rows start_row..start_row+rows of a multi-station hourly archive"""
+    index = np.arange(start_row, start_row + rows)
+    station = index % stations
+    timestamps = pd.Timestamp(ARCHIVE_START) + pd.to_timedelta(index // stations, unit='h')
+
+    day_of_year = timestamps.dayofyear.to_numpy()
+    hour = timestamps.hour.to_numpy()
+    season = np.cos(2 * np.pi * (day_of_year - 15) / 365.25)  # 1 in mid-January
+    daily = np.cos(2 * np.pi * (hour - 15) / 24)  # warmest mid-afternoon
+
+    temperature = 18 - 8 * season + 5 * daily - 2 * station + rng.normal(0, 2, rows)
+    humidity = np.clip(60 + 15 * -season - 10 * daily + rng.normal(0, 10, rows), 5, 100)
+    wind = np.abs(2.5 + daily + rng.normal(0, 1.2, rows))
+    pressure = 970 + 3 * season - 4 * station + rng.normal(0, 1.5, rows)
+
+    frame = pd.DataFrame({
+        'SID': np.char.add('ISRO00', (19 + station).astype(str)),
+        'DATE(IST)': _format_dates(timestamps, ['%m-%d-%Y', '%m/%d/%Y'], rng),
+        'TIME(IST)': np.char.add(np.char.zfill(hour.astype(str), 2), ':00'),
+        'AIR_TEMP(°C)': temperature.round(1),
+        'HUMIDITY(%)': humidity.round(1),
+        'WIND_SPEED(m/s)': wind.round(2),
+        'ATMO_PRESSURE(hpa)': pressure.round(1),
+    }, columns=ARCHIVE_COLUMNS)
+
+    # The real archive has missing readings
+    gaps = rng.random(rows) < 0.002
+    frame.loc[gaps, 'AIR_TEMP(°C)'] = np.nan
+    frame.loc[rng.random(rows) < 0.0005, 'HUMIDITY(%)'] = np.nan
+    return frame
+
+
+def write_archive(path, rows, stations=1, seed=0):
+    """Write an ISRO-format archive with `rows` readings spread over `stations`"""
+    rng = np.random.default_rng(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        for start in range(0, rows, CHUNK_ROWS):
+            chunk = archive_chunk(start, min(CHUNK_ROWS, rows - start), stations, rng)
+            chunk.to_csv(fh, header=start == 0, index=False)
+    return path
+
+
+def write_snapshots(path, rows, seed=0):
+    """Write a current_weather_data.csv with one row per location every 10 minutes"""
+    rng = np.random.default_rng(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        for start in range(0, rows, CHUNK_ROWS):
+            count = min(CHUNK_ROWS, rows - start)
+            index = np.arange(start, start + count)
+            location = index % len(SNAPSHOT_LOCATIONS)
+            timestamps = pd.Timestamp('2025-01-01') + pd.to_timedelta(
+                (index // len(SNAPSHOT_LOCATIONS)) * 10, unit='min')
+            frame = pd.DataFrame({
+                'datetime': timestamps.strftime('%Y-%m-%d %H:%M:%S'),
+                'location': np.array(SNAPSHOT_LOCATIONS)[location],
+                'temperature': (10 + 5 * location + rng.normal(0, 3, count)).round(1),
+                'humidity': rng.integers(20, 90, count),
+                'wind_speed': np.abs(rng.normal(2.5, 1, count)).round(1),
+                'pressure': (965 + 12 * (location > 1) + rng.normal(0, 2, count)).round(1),
+                'visibility': rng.choice([8, 10, 12, 15, 18], count),
+                'cloud_cover': rng.integers(0, 60, count),
+            }, columns=SNAPSHOT_COLUMNS)
+            frame.to_csv(fh, header=start == 0, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic benchmark data')
+    parser.add_argument('kind', choices=['archive', 'snapshots'])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('--stations', type=int, default=1, help='Archive stations (default: 1)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args()
+
+    if args.kind == 'archive':
+        write_archive(args.output, args.rows, args.stations, args.seed)
+    else:
+        write_snapshots(args.output, args.rows, args.seed)
+    print(f"Wrote {args.rows} {args.kind} rows to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
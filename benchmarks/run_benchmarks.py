@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the Telescope Weather App.
+
+Generates synthetic ISRO archives and snapshot files (see
+generate_data.py), then times the data paths behind the dashboard:
+archive loading, get_past_data, get_historical_records_for_today,
+generate_forecast_from_csv, the snapshot tail, the CSV export and the
+full /api/telescope-conditions handler.  Each result has the best and
+median wall time, throughput and peak Python memory (tracemalloc).
+
+Upstream calls are not benchmarked: ACCUWEATHER_API_KEY is cleared so
+the handlers use their offline fallbacks.
+
+    python benchmarks/run_benchmarks.py                      # 10k, 100k, 1M rows
+    python benchmarks/run_benchmarks.py --sizes 10k,10m --json results.json
+    python benchmarks/run_benchmarks.py --compare results.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_data import write_archive, write_snapshots  # noqa: E402
+
+
+def parse_size(text):
+    """'10k' -> 10000, '2m' -> 2000000"""
+    text = text.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def measure(name, size, fn, repeat=3, setup=None, unit='rows'):
+    """Time fn() `repeat` times (after setup()), then once more under tracemalloc
+
+    Throughput is rows per second for work that scans the data
+    (unit='rows') and calls per second otherwise (unit='calls').
+    """
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    best = min(times)
+    work = size if unit == 'rows' else 1
+    result = {
+        'name': name,
+        'size': size,
+        'best_s': round(best, 6),
+        'median_s': round(statistics.median(times), 6),
+        'throughput': round(work / best, 1) if best > 0 else None,
+        'unit': unit,
+        'peak_mb': round(peak / 2 ** 20, 2)
+    }
+    print(f"  {name:<42} {size:>10,} {result['best_s'] * 1000:>11.2f} {result['median_s'] * 1000:>11.2f} "
+          f"{result['throughput'] or 0:>14,.0f} {unit + '/s':<8} {result['peak_mb']:>9.1f}")
+    return result
+
+
+def data_file(workdir, kind, rows, stations=1):
+    """Generate a synthetic file once per size and reuse it on later runs"""
+    name = f"{kind}_{rows}_{stations}.csv" if kind == 'archive' else f"{kind}_{rows}.csv"
+    path = os.path.join(workdir, name)
+    if not os.path.exists(path):
+        print(f"Generating {rows:,} {kind} rows -> {path}")
+        if kind == 'archive':
+            write_archive(path, rows, stations)
+        else:
+            write_snapshots(path, rows)
+    return path
+
+
+def archive_benchmarks(app, path, rows, repeat):
+    from historical_data import HistoricalArchive, load_historical_data
+
+    results = [
+        measure('load archive (CSV parse)', rows,
+                lambda: load_historical_data(path, use_cache=False), repeat),
+    ]
+    load_historical_data(path)  # writes the snapshot
+    results.append(measure('load archive (snapshot)', rows, lambda: load_historical_data(path), repeat))
+
+    frame = load_historical_data(path)
+    app.archive = HistoricalArchive(path, loader=lambda _: frame)
+    cold = app.archive.reload  # drops every derived structure, keeps the frame
+
+    results += [
+        measure('get_past_data (first call)', rows, app.get_past_data, repeat, setup=cold),
+        measure('get_past_data (memoized)', rows, app.get_past_data, repeat, unit='calls'),
+        measure('get_historical_records_for_today (first)', rows,
+                app.get_historical_records_for_today, repeat, setup=cold),
+        measure('get_historical_records_for_today', rows, app.get_historical_records_for_today, repeat,
+                unit='calls'),
+        measure('generate_forecast_from_csv', rows, app.generate_forecast_from_csv, repeat, unit='calls'),
+    ]
+
+    client = app.app.test_client()
+    dashboard = lambda: client.get('/api/telescope-conditions/nainital').data
+    results += [
+        measure('dashboard handler (first call)', rows, dashboard, repeat, setup=cold, unit='calls'),
+        measure('dashboard handler', rows, dashboard, repeat, unit='calls'),
+    ]
+    return results
+
+
+def snapshot_benchmarks(app, path, rows, repeat):
+    from snapshot_store import manifest_path
+
+    app.SNAPSHOT_FILE = path
+    client = app.app.test_client()
+
+    def drop_manifest():
+        if os.path.exists(manifest_path(path)):
+            os.remove(manifest_path(path))
+
+    return [
+        measure('saved snapshot tail (20 rows)', rows, app.get_saved_weather_data, repeat, unit='calls'),
+        measure('export stats (manifest rebuild)', rows,
+                lambda: client.get('/api/export-stats').data, repeat, setup=drop_manifest),
+        measure('export stats (manifest)', rows, lambda: client.get('/api/export-stats').data, repeat,
+                unit='calls'),
+        measure('export CSV', rows, lambda: client.get('/export/weather-data').data, repeat),
+        measure('export CSV (gzip)', rows, lambda: client.get(
+            '/export/weather-data', headers={'Accept-Encoding': 'gzip'}).data, repeat),
+    ]
+
+
+def compare(results, baseline_path, threshold):
+    """Print benchmarks whose median got slower than threshold x the baseline"""
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = {(r['name'], r['size']): r for r in json.load(fh)['results']}
+
+    regressions = []
+    for result in results:
+        before = baseline.get((result['name'], result['size']))
+        if before and before['median_s'] > 0:
+            ratio = result['median_s'] / before['median_s']
+            if ratio > threshold:
+                regressions.append((result, ratio))
+
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} regression(s) against {baseline_path}:")
+        for result, ratio in regressions:
+            print(f"  {result['name']} @ {result['size']:,}: {ratio:.2f}x slower")
+    else:
+        print(f"\n✅ No regressions against {baseline_path} (threshold {threshold}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Telescope Weather App data paths')
+    parser.add_argument('--sizes', default='10k,100k,1m', help='Archive sizes in rows (default: 10k,100k,1m)')
+    parser.add_argument('--snapshot-sizes', default='1k,100k,1m',
+                        help='current_weather_data.csv sizes in rows (default: 1k,100k,1m)')
+    parser.add_argument('--stations', type=int, default=4, help='Stations in the archive (default: 4)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark (default: 3)')
+    parser.add_argument('--workdir', help='Where generated data is kept (default: a temporary directory)')
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--compare', help='Earlier --json results to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Slowdown ratio reported as a regression (default: 1.25)')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='telescope-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    archive_sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    snapshot_sizes = [parse_size(size) for size in args.snapshot_sizes.split(',') if size.strip()]
+
+    archives = {rows: data_file(workdir, 'archive', rows, args.stations) for rows in archive_sizes}
+    snapshots = {rows: data_file(workdir, 'snapshots', rows) for rows in snapshot_sizes}
+
+    # Offline, self-contained app instance
+    os.environ['ACCUWEATHER_API_KEY'] = ''
+    os.environ['COLLECTOR_ENABLED'] = 'false'
+    # The app logs progress through its queue handler; keep it off the benchmark output
+    os.environ['LOG_LEVEL'] = 'CRITICAL'
+    os.environ['DATA_CACHE_DIR'] = os.path.join(workdir, 'cache')
+    os.environ['HISTORICAL_DATA_FILE'] = archives[archive_sizes[0]] if archive_sizes else ''
+    os.chdir(ROOT)
+    import app
+
+    print("🔭 Telescope Weather App - Benchmarks")
+    print(f"  {'benchmark':<42} {'rows':>10} {'best ms':>11} {'median ms':>11} {'throughput':>23} {'peak MB':>9}")
+    results = []
+    for rows, path in archives.items():
+        results += archive_benchmarks(app, path, rows, args.repeat)
+    for rows, path in snapshots.items():
+        results += snapshot_benchmarks(app, path, rows, args.repeat)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': results}, fh, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Circuit breaker for upstream API calls.
+
+When AccuWeather's quota is spent or the network is down, every call
+used to wait out its timeout (and retries) before the app fell back to
+simulated data.  A CircuitBreaker counts consecutive failures for one
+family of endpoints; once it opens, calls are skipped immediately until
+a trial call is let through after `reset_timeout` seconds.  Each failed
+trial doubles the wait, up to `max_reset_timeout`.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Closed -> open after failures -> half-open trial -> closed or open again"""
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=60,
+                 max_reset_timeout=900, clock=time.time):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.state = CLOSED
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self.opened_at = None
+        self.last_error = None
+        self._trial_running = False
+        self._rejected = 0
+        self._times_opened = 0
+
+    def allow(self):
+        """True if a call may go upstream now; in half-open state only one trial at a time"""
+        with self._lock:
+            if self.state == OPEN and self._clock() >= self.opened_at + self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self._rejected += 1
+            return False
+
+    def release(self):
+        """Give back a permit from allow() that was not used for a call"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self, error=None, trip=False):
+        """Count a failed call; `trip` opens the circuit regardless of the count"""
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN:
+                self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+                self._open()
+            elif self.state == CLOSED and (trip or self.failures >= self.failure_threshold):
+                self._open()
+            self._trial_running = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = self._clock()
+        self._times_opened += 1
+        logger.warning("Circuit %r opened after %d failure(s); retrying in %ss (%s)",
+                       self.name, self.failures, self.reset_timeout, self.last_error)
+
+    def status(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0, round(self.opened_at + self.reset_timeout - self._clock(), 1))
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'retry_in_seconds': retry_in,
+                'reset_timeout_seconds': self.reset_timeout,
+                'times_opened': self._times_opened,
+                'rejected_calls': self._rejected,
+                'last_error': self.last_error
+            }
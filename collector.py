@@ -0,0 +1,94 @@
+"""
+Background collection of weather snapshots.
+
+Snapshots used to be fetched and saved inside every dashboard request.
+SnapshotCollector runs the collection on its own thread at a fixed
+interval instead, so the upstream call rate and the request latency no
+longer depend on how many browsers have the dashboard open.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCollector:
+    """Calls `collect` every `interval` seconds on a daemon thread
+
+    `collect` returns the rows it saved; the most recent ones are kept as
+    the collector's latest state.
+    """
+
+    def __init__(self, collect, interval=600):
+        self.collect = collect
+        self.interval = interval
+        self.latest = []
+        self.last_run = None
+        self.last_duration = None
+        self.runs = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_once(self):
+        started = time.time()
+        try:
+            rows = self.collect()
+        except Exception as e:
+            logger.exception("Snapshot collection failed: %s", e)
+            self.failures += 1
+            return None
+
+        with self._lock:
+            if rows:
+                self.latest = rows
+            self.last_run = datetime.now()
+            self.last_duration = time.time() - started
+            self.runs += 1
+        return rows
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def run_forever(self):
+        """Collect on the calling thread until stop() is called"""
+        self._stop.clear()
+        self._loop()
+
+    def start(self):
+        """Start collecting in the background; does nothing if already running"""
+        with self._lock:
+            if self.is_running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='snapshot-collector', daemon=True)
+            self._thread.start()
+        logger.info("Snapshot collector started (every %ss)", self.interval)
+        return True
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self):
+        with self._lock:
+            return {
+                'running': self.is_running,
+                'interval_seconds': self.interval,
+                'runs': self.runs,
+                'failures': self.failures,
+                'last_run': self.last_run.isoformat() if self.last_run else None,
+                'last_duration_seconds': round(self.last_duration, 3) if self.last_duration is not None else None,
+                'latest': self.latest
+            }
@@ -0,0 +1,494 @@
+"""
+Loading of the ISRO historical weather archive.
+
+Parsing the raw CSV is the slow part of startup, so the cleaned frame is
+also written to a columnar ``.npz`` snapshot next to a small metadata
+record (source size and mtime).  Later starts load the snapshot directly
+as long as the source file has not changed.
+
+The resident frame is kept compact, since every worker process holds its
+own copy: only the station and measurement columns, float32 values, the
+station as a categorical, and the dates as a sorted DatetimeIndex named
+DATE(IST) rather than a column.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMN = 'DATE(IST)'
+NUMERIC_COLUMNS = ['AIR_TEMP(°C)', 'HUMIDITY(%)', 'WIND_SPEED(m/s)', 'ATMO_PRESSURE(hpa)']
+# Text columns kept (as categoricals); anything else in the CSV is dropped
+CATEGORY_COLUMNS = ['SID']
+ARCHIVE_COLUMNS = [DATE_COLUMN] + CATEGORY_COLUMNS + NUMERIC_COLUMNS
+MEASUREMENT_DTYPE = np.float32
+
+# Tried in order, the first format that matches a value wins
+DATE_FORMATS = ['%m-%d-%Y', '%m/%d/%Y', '%Y-%m-%d', '%d-%m-%Y']
+
+DEFAULT_CACHE_DIR = '.cache'
+CACHE_FORMAT_VERSION = 2
+
+
+def parse_dates(values):
+    """Parse a column of date strings trying every format in DATE_FORMATS
+
+    Each distinct value is parsed once, so the cost depends on the number of
+    days in the archive rather than the number of rows.
+    """
+    codes, uniques = pd.factorize(pd.Series(values).astype(str).str.strip())
+    unique_values = pd.Series(uniques)
+    parsed = pd.Series(pd.NaT, index=unique_values.index, dtype='datetime64[ns]')
+
+    for fmt in DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(unique_values[missing], format=fmt, errors='coerce')
+
+    return pd.Series(parsed.to_numpy()[codes], index=getattr(values, 'index', None))
+
+
+def clean_historical_frame(raw_df):
+    """Parse dates, drop undated rows and coerce the measurement columns"""
+    cleaned = raw_df.copy()
+    cleaned[DATE_COLUMN] = parse_dates(cleaned[DATE_COLUMN])
+    cleaned = cleaned.dropna(subset=[DATE_COLUMN])
+
+    for col in NUMERIC_COLUMNS:
+        if col in cleaned.columns:
+            cleaned[col] = pd.to_numeric(cleaned[col], errors='coerce')
+
+    return cleaned
+
+
+def compact_frame(cleaned):
+    """Resident form of a cleaned frame: needed columns only, float32, sorted date index
+
+    Rows of the same date keep their archive order.
+    """
+    columns = [col for col in CATEGORY_COLUMNS + NUMERIC_COLUMNS if col in cleaned.columns]
+    compact = pd.DataFrame({
+        col: cleaned[col].astype('category') if col in CATEGORY_COLUMNS
+        else cleaned[col].astype(MEASUREMENT_DTYPE)
+        for col in columns
+    }, columns=columns)
+    compact.index = pd.DatetimeIndex(cleaned[DATE_COLUMN], name=DATE_COLUMN)
+    return compact.sort_index(kind='stable')
+
+
+def archive_dates(frame):
+    """The DatetimeIndex of an archive frame (empty for an empty frame)"""
+    if isinstance(frame.index, pd.DatetimeIndex):
+        return frame.index
+    return pd.DatetimeIndex([], name=DATE_COLUMN)
+
+
+def memory_usage(frame):
+    """Resident bytes of a frame, index and text included"""
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {
+        'format': CACHE_FORMAT_VERSION,
+        'source': os.path.basename(csv_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+
+
+def snapshot_path(csv_path, cache_dir=None):
+    """Location of the columnar snapshot for a given source CSV"""
+    cache_dir = cache_dir or os.getenv('DATA_CACHE_DIR', DEFAULT_CACHE_DIR)
+    return os.path.join(cache_dir, os.path.basename(csv_path) + '.npz')
+
+
+def write_snapshot(frame, path, signature):
+    """Store a compact frame as one array per column in an ``.npz`` file"""
+    arrays = {'index': archive_dates(frame).to_numpy(dtype='datetime64[ns]').view('int64')}
+    columns = []
+
+    for i, col in enumerate(frame.columns):
+        series = frame[col]
+        key = f'col{i}'
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            arrays[key] = series.cat.codes.to_numpy()
+            arrays[key + '_categories'] = series.cat.categories.astype(str).to_numpy(dtype=str)
+            kind = 'category'
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            arrays[key] = series.to_numpy(dtype='datetime64[ns]').view('int64')
+            kind = 'datetime'
+        elif pd.api.types.is_numeric_dtype(series):
+            arrays[key] = series.to_numpy()
+            kind = 'numeric'
+        else:
+            arrays[key] = series.fillna('').astype(str).to_numpy(dtype=str)
+            arrays[key + '_null'] = series.isna().to_numpy()
+            kind = 'text'
+        columns.append({'name': col, 'key': key, 'kind': kind})
+
+    meta = dict(signature, columns=columns)
+    arrays['__meta__'] = np.array(json.dumps(meta))
+
+    # A unique temp file per writer, so workers starting together do not interleave
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            np.savez(fh, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path, signature):
+    """Return the cached frame, or None when it is missing or out of date"""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['__meta__']))
+            if any(meta.get(k) != v for k, v in signature.items()):
+                return None
+
+            columns = {}
+            for col in meta['columns']:
+                values = data[col['key']]
+                if col['kind'] == 'category':
+                    values = pd.Categorical.from_codes(values, data[col['key'] + '_categories'].astype(object))
+                elif col['kind'] == 'datetime':
+                    values = values.view('datetime64[ns]')
+                elif col['kind'] == 'text':
+                    values = values.astype(object)
+                    values[data[col['key'] + '_null']] = np.nan
+                columns[col['name']] = values
+            index = pd.DatetimeIndex(data['index'].view('datetime64[ns]'), name=DATE_COLUMN)
+    except Exception as e:
+        # Missing, truncated or otherwise unreadable: re-parse the CSV instead
+        if not isinstance(e, FileNotFoundError):
+            logger.warning("Ignoring unreadable data snapshot %s: %s", path, e)
+        return None
+
+    return pd.DataFrame(columns, index=index, columns=[col['name'] for col in meta['columns']])
+
+
+def load_historical_data(csv_path, use_cache=True, cache_dir=None):
+    """Load the cleaned historical archive, using the snapshot when it is fresh"""
+    try:
+        signature = _source_signature(csv_path)
+        cache_file = snapshot_path(csv_path, cache_dir)
+
+        if use_cache:
+            cached = read_snapshot(cache_file, signature)
+            if cached is not None:
+                logger.info("Loaded %d records from snapshot %s (%.1f MB resident)",
+                            len(cached), cache_file, memory_usage(cached) / 1e6)
+                return cached
+
+        # Columns the app never reads are not parsed at all
+        raw_df = pd.read_csv(csv_path, usecols=lambda col: col in ARCHIVE_COLUMNS)
+        logger.info("Loaded CSV with %d records", len(raw_df))
+
+        data = compact_frame(clean_historical_frame(raw_df))
+        logger.info("Successfully processed %d valid records", len(data))
+        if len(data):
+            logger.info("Date range: %s to %s", data.index[0], data.index[-1])
+        logger.info("Archive resident size: %.1f MB (%.1f MB as parsed)",
+                    memory_usage(data) / 1e6, memory_usage(raw_df) / 1e6)
+
+        if use_cache:
+            try:
+                write_snapshot(data, cache_file, signature)
+            except OSError as e:
+                logger.warning("Could not write data snapshot: %s", e)
+
+        return data
+
+    except Exception as e:
+        logger.error("Error loading CSV data: %s", e)
+        return pd.DataFrame()
+
+
+# Day offsets of each month in a leap year, so 29 Feb gets its own slot
+_MONTH_OFFSETS = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+DAY_SLOTS = 366
+
+
+def calendar_slot(month, day):
+    """Position of a (month, day) pair in a 366-day calendar, 0-based"""
+    return _MONTH_OFFSETS[np.asarray(month) - 1] + np.asarray(day) - 1
+
+
+class ClimatologyIndex:
+    """Archive rows and per-variable aggregates bucketed by calendar day
+
+    Built once per loaded frame.  Row offsets are positional (``iloc``) and
+    the aggregates are kept as counts, sums and sums of squares so that any
+    window of days can be combined without touching the rows again.
+    """
+
+    def __init__(self, frame, columns=NUMERIC_COLUMNS):
+        self.columns = [col for col in columns if col in frame.columns]
+        k = len(self.columns)
+
+        dates = archive_dates(frame)
+        if frame.empty or dates.empty:
+            slots = np.empty(0, dtype=np.int64)
+            values = np.empty((0, k))
+        else:
+            slots = calendar_slot(dates.month.to_numpy(), dates.day.to_numpy())
+            values = frame[self.columns].to_numpy(dtype=np.float64)
+
+        # Stable sort keeps rows of a bucket in archive order
+        self._order = np.argsort(slots, kind='stable')
+        self._bounds = np.searchsorted(slots[self._order], np.arange(DAY_SLOTS + 1))
+
+        # Centre on the overall mean before accumulating squares
+        valid = ~np.isnan(values)
+        totals = valid.sum(axis=0)
+        self._shift = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(totals, 1)
+        centered = np.where(valid, values - self._shift, 0.0)
+
+        self._rows = np.bincount(slots, minlength=DAY_SLOTS)
+        self._count = np.zeros((DAY_SLOTS, k))
+        self._sum = np.zeros((DAY_SLOTS, k))
+        self._sumsq = np.zeros((DAY_SLOTS, k))
+        for j in range(k):
+            self._count[:, j] = np.bincount(slots, weights=valid[:, j], minlength=DAY_SLOTS)
+            self._sum[:, j] = np.bincount(slots, weights=centered[:, j], minlength=DAY_SLOTS)
+            self._sumsq[:, j] = np.bincount(slots, weights=centered[:, j] ** 2, minlength=DAY_SLOTS)
+
+    def _window_slots(self, month, day, days):
+        centre = int(calendar_slot(month, day))
+        return np.arange(centre - days, centre + days + 1) % DAY_SLOTS
+
+    def _month_slots(self, months):
+        slots = []
+        for month in months:
+            start = _MONTH_OFFSETS[month - 1]
+            end = _MONTH_OFFSETS[month] if month < 12 else DAY_SLOTS
+            slots.extend(range(start, end))
+        return np.array(slots, dtype=np.int64)
+
+    def _rows_for_slots(self, slots):
+        parts = [self._order[self._bounds[s]:self._bounds[s + 1]] for s in slots]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def rows(self, month, day, days=0):
+        """Row offsets for a calendar day, or the window of ±days around it"""
+        return self._rows_for_slots(self._window_slots(month, day, days))
+
+    def month_rows(self, month):
+        """Row offsets for a whole month, in archive order"""
+        return np.sort(self._rows_for_slots(self._month_slots([month])))
+
+    def _stats_for_slots(self, slots):
+        n = self._count[slots].sum(axis=0)
+        s = self._sum[slots].sum(axis=0)
+        sq = self._sumsq[slots].sum(axis=0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(n > 0, s / n + self._shift, np.nan)
+            var = np.where(n > 1, (sq - s * s / n) / (n - 1), np.nan)
+        std = np.sqrt(np.maximum(var, 0))
+
+        return {
+            'rows': int(self._rows[slots].sum()),
+            'mean': dict(zip(self.columns, mean.tolist())),
+            'std': dict(zip(self.columns, std.tolist())),
+            'count': dict(zip(self.columns, n.astype(int).tolist())),
+        }
+
+    def stats(self, month, day, days=0):
+        """Mean, sample std and count per variable for a day or ±days window"""
+        return self._stats_for_slots(self._window_slots(month, day, days))
+
+    def month_stats(self, months):
+        """Aggregates for one or more whole months"""
+        return self._stats_for_slots(self._month_slots(months))
+
+
+# Summary fields and the archive column each one averages
+SUMMARY_AVERAGES = {
+    'avg_temp': 'AIR_TEMP(°C)',
+    'avg_humidity': 'HUMIDITY(%)',
+    'avg_wind': 'WIND_SPEED(m/s)',
+    'avg_pressure': 'ATMO_PRESSURE(hpa)',
+}
+
+
+def optimal_conditions_mask(frame):
+    """Rows meeting all four telescope viewing thresholds"""
+    return (
+        (frame['HUMIDITY(%)'] < 70) &
+        (frame['WIND_SPEED(m/s)'] < 3) &
+        (frame['ATMO_PRESSURE(hpa)'] > 960) &
+        (frame['AIR_TEMP(°C)'].between(5, 20))
+    )
+
+
+def period_table(frame):
+    """Record, optimal and per-column sum/count totals for each (year, month)
+
+    Every summary and breakdown is a sum over rows of this table.
+    """
+    dates = archive_dates(frame)
+    keys = [dates.year.rename('year'), dates.month.rename('month')]
+    columns = list(SUMMARY_AVERAGES.values())
+
+    # Accumulate in float64; the resident float32 values would lose digits in the sums
+    grouped = frame[columns].astype(np.float64).groupby(keys)
+    table = pd.concat({'sum': grouped.sum(), 'count': grouped.count()}, axis=1)
+    table['records'] = grouped.size()
+    table['optimal'] = optimal_conditions_mask(frame).groupby(keys).sum()
+    return table
+
+
+def summarize(table):
+    """Collapse period_table rows into the get_past_data() summary fields"""
+    totals = table.sum()
+    total_records = int(totals['records'].iloc[0])
+    optimal_days = int(totals['optimal'].iloc[0])
+
+    summary = {
+        'total_records': total_records,
+        'optimal_days': optimal_days,
+        'optimal_percentage': round((optimal_days / total_records) * 100, 1) if total_records > 0 else 0,
+    }
+    for field, col in SUMMARY_AVERAGES.items():
+        count = totals[('count', col)]
+        summary[field] = round(float(totals[('sum', col)] / count), 1) if count > 0 else float('nan')
+    return summary
+
+
+class HistoricalArchive:
+    """The loaded archive plus everything derived from it
+
+    Nothing is read when the archive is created: the file is loaded on
+    first use, once, with concurrent callers waiting for that load, or
+    ahead of time by warm_up().  Derived data (the climatology index,
+    summaries, breakdowns) is built once per dataset version, on first
+    use, and dropped when the archive is reloaded.
+    """
+
+    def __init__(self, csv_path, loader=load_historical_data):
+        self.csv_path = csv_path
+        self._loader = loader
+        self._lock = threading.RLock()
+        self.version = 0
+        self.loaded_at = None
+        self._frame = None
+        self._derived = {}
+        self._warmup = None
+
+    def _install(self, frame):
+        # Call with the lock held
+        self._frame = frame
+        self.version += 1
+        self.loaded_at = datetime.now()
+        self._derived = {}
+
+    @property
+    def loaded(self):
+        return self._frame is not None
+
+    @property
+    def frame(self):
+        """The archive frame, loaded on first access"""
+        frame = self._frame
+        if frame is None:
+            with self._lock:
+                if self._frame is None:
+                    self._install(self._loader(self.csv_path))
+                frame = self._frame
+        return frame
+
+    def ensure_loaded(self):
+        """Load the archive unless already loaded; returns the dataset version"""
+        self.frame
+        return self.version
+
+    def reload(self):
+        """Load the archive again and invalidate everything derived from it
+
+        The previous frame keeps serving readers until the new one is in.
+        """
+        frame = self._loader(self.csv_path)
+        with self._lock:
+            self._install(frame)
+            return self.version
+
+    def warm_up(self, derived=('climatology', 'summary')):
+        """Load the archive and build the named derived data on a background thread
+
+        Started at most once; returns the thread.
+        """
+        def run():
+            started = time.perf_counter()
+            try:
+                self.ensure_loaded()
+                for name in derived:
+                    value = getattr(self, name)
+                    if callable(value):
+                        value()
+            except Exception:
+                logger.exception("Archive warm-up failed")
+                return
+            logger.info("Archive warmed up in %.2fs", time.perf_counter() - started)
+
+        with self._lock:
+            if self._warmup is None:
+                self._warmup = threading.Thread(target=run, name='archive-warmup', daemon=True)
+                self._warmup.start()
+            return self._warmup
+
+    def status(self):
+        frame = self._frame
+        return {
+            'loaded': frame is not None,
+            'records': len(frame) if frame is not None else None,
+            'version': self.version,
+            'loaded_at': self.loaded_at.isoformat() if self.loaded_at else None,
+            'memory_bytes': memory_usage(frame) if frame is not None else None,
+            'warming_up': bool(self._warmup and self._warmup.is_alive())
+        }
+
+    def derived(self, name, build):
+        """Return a value computed from the current frame, building it once"""
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = build(self.frame)
+            return self._derived[name]
+
+    @property
+    def climatology(self):
+        return self.derived('climatology', ClimatologyIndex)
+
+    def _periods(self):
+        return self.derived('periods', period_table)
+
+    def summary(self):
+        return dict(self.derived('summary', lambda frame: summarize(self._periods())))
+
+    def breakdown(self, by):
+        """Summary per 'year' or per 'month' (calendar month across all years)"""
+        if by not in ('year', 'month'):
+            raise ValueError(f"Unknown breakdown: {by}")
+
+        def build(frame):
+            periods = self._periods()
+            return [dict(summarize(group), **{by: int(key)})
+                    for key, group in periods.groupby(level=by)]
+
+        return [dict(row) for row in self.derived(f'breakdown_{by}', build)]
@@ -0,0 +1,86 @@
+"""
+Shared HTTP client for upstream API calls.
+
+One requests.Session is reused for every call so TCP/TLS connections stay
+open between requests.  Failed calls (connection errors, timeouts, 429 and
+5xx responses) are retried a bounded number of times with jittered
+exponential backoff, and each host gets a cap on simultaneous requests so
+a burst of dashboard loads does not turn into a burst upstream.  Every
+retry is a real upstream request, so callers can veto retries (for
+example when a call budget is spent) with a `may_retry` callback.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class HttpClient:
+    """Pooled keep-alive HTTP client with retries and per-host limits"""
+
+    def __init__(self, max_retries=2, backoff_base=0.5, backoff_cap=4.0,
+                 per_host_limit=4, pool_size=10, retry_statuses=RETRY_STATUSES,
+                 sleep=time.sleep):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.per_host_limit = per_host_limit
+        self.retry_statuses = frozenset(retry_statuses)
+        self._sleep = sleep
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return slot
+
+    def backoff_delay(self, attempt, response=None):
+        """Full-jitter exponential backoff, honouring a numeric Retry-After"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def get(self, url, params=None, timeout=10, may_retry=None):
+        """GET with retries; returns the last response or raises the last error
+
+        may_retry(), when given, is called before each retry; returning
+        False ends the retries there.
+        """
+        slot = self._slot(url)
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                with slot:
+                    response = self.session.get(url, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_attempt or (may_retry is not None and not may_retry()):
+                    raise
+                self._sleep(self.backoff_delay(attempt))
+                continue
+
+            if (response.status_code not in self.retry_statuses or last_attempt
+                    or (may_retry is not None and not may_retry())):
+                return response
+            self._sleep(self.backoff_delay(attempt, response))
+
+    def close(self):
+        self.session.close()
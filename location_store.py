@@ -0,0 +1,170 @@
+"""
+Persistent cache of AccuWeather location keys.
+
+City names only resolve through /locations/v1/cities/search, which costs
+a call from the daily budget.  LocationKeyStore remembers every answer in
+a small SQLite file, with an in-memory LRU in front of it, so a city
+costs one upstream call ever rather than one per lookup.  Cities the
+search did not find are remembered too, but only for a shorter TTL, so a
+typo cannot drain the budget and a new listing is still picked up.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NEGATIVE_TTL = 6 * 3600
+
+_UNKNOWN = object()
+
+
+class LocationKeyStore:
+    """City name -> location key, on disk with an in-memory LRU
+
+    A stored key of None means the city was searched for and not found.
+    Keys seeded from code never expire; searched keys expire after
+    `positive_ttl` (None: never) and misses after `negative_ttl`.
+    """
+
+    def __init__(self, path, max_entries=256, positive_ttl=None,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._memory = OrderedDict()  # city -> (key, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'negative_hits': 0, 'misses': 0, 'searches': 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS location_keys ('
+                'city TEXT PRIMARY KEY, location_key TEXT, resolved_at REAL, expires_at REAL)')
+
+    @staticmethod
+    def normalize(city_name):
+        return ' '.join(city_name.lower().split())
+
+    def _remember(self, city, key, expires_at):
+        self._memory[city] = (key, expires_at)
+        self._memory.move_to_end(city)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, city):
+        """Stored key (possibly None for a known miss), or _UNKNOWN; call with the lock held"""
+        now = self._clock()
+        entry = self._memory.get(city)
+        if entry is not None:
+            if entry[1] is None or entry[1] > now:
+                self._memory.move_to_end(city)
+                self._stats['memory_hits'] += 1
+                return entry[0]
+            del self._memory[city]
+
+        row = self._db.execute(
+            'SELECT location_key, expires_at FROM location_keys WHERE city = ?', (city,)).fetchone()
+        if row is not None and (row[1] is None or row[1] > now):
+            self._remember(city, row[0], row[1])
+            self._stats['disk_hits'] += 1
+            return row[0]
+
+        self._stats['misses'] += 1
+        return _UNKNOWN
+
+    def _store(self, city, key, ttl):
+        now = self._clock()
+        expires_at = None if ttl is None else now + ttl
+        self._remember(city, key, expires_at)
+        with self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO location_keys (city, location_key, resolved_at, expires_at) '
+                'VALUES (?, ?, ?, ?)', (city, key, now, expires_at))
+
+    def seed(self, keys):
+        """Install known city -> key pairs that never expire"""
+        with self._lock:
+            for city_name, key in keys.items():
+                self._store(self.normalize(city_name), key, None)
+
+    def get(self, city_name, default=None):
+        with self._lock:
+            key = self._lookup(self.normalize(city_name))
+        return default if key is _UNKNOWN else key
+
+    def is_known(self, city_name):
+        """True when a key or a remembered miss is stored for the city"""
+        with self._lock:
+            return self._lookup(self.normalize(city_name)) is not _UNKNOWN
+
+    def put(self, city_name, key):
+        """Record a search result; key None records a miss with the negative TTL"""
+        ttl = self.negative_ttl if key is None else self.positive_ttl
+        with self._lock:
+            self._store(self.normalize(city_name), key, ttl)
+
+    def lookup(self, city_name):
+        """(True, key) for a stored city (key None for a known miss), (False, None) when it must be searched
+
+        Counted in stats() like resolve(), which callers with a search of
+        their own (e.g. an async one) replace with lookup() then put().
+        """
+        with self._lock:
+            key = self._lookup(self.normalize(city_name))
+            if key is _UNKNOWN:
+                self._stats['searches'] += 1
+                return False, None
+            if key is None:
+                self._stats['negative_hits'] += 1
+            return True, key
+
+    def resolve(self, city_name, search):
+        """Stored key for the city, calling search(city_name) only when unknown
+
+        search returns the key, or None when the city does not exist; an
+        exception means the answer is unknown and nothing is stored.
+        """
+        known, key = self.lookup(city_name)
+        if known:
+            return key
+
+        key = search(city_name)
+        self.put(city_name, key)
+        return key
+
+    def resolve_many(self, city_names, search, executor=None):
+        """Resolve a list of cities up front; unknown ones are searched in parallel on executor"""
+        unknown = [name for name in dict.fromkeys(city_names) if not self.is_known(name)]
+        if executor is not None and len(unknown) > 1:
+            futures = [executor.submit(self.resolve, name, search) for name in unknown]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.warning("Location search error: %s", e)
+        else:
+            for name in unknown:
+                try:
+                    self.resolve(name, search)
+                except Exception as e:
+                    logger.warning("Location search error: %s", e)
+        return {name: self.get(name) for name in city_names}
+
+    def stats(self):
+        with self._lock:
+            stored = self._db.execute('SELECT COUNT(*) FROM location_keys').fetchone()[0]
+            return dict(self._stats, memory_entries=len(self._memory), stored=stored)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,145 @@
+"""
+Logging setup for the Telescope Weather App.
+
+Modules log through their own loggers (logging.getLogger(__name__)).
+configure_logging() routes every record through a QueueHandler, so the
+request threads only put records on an in-memory queue; a QueueListener
+thread does the console I/O.  Repeated warnings and errors (for example
+the same upstream failure on every request while AccuWeather is down)
+are rate-limited per message template.
+
+Per-call AccuWeather tracing goes to the 'upstream' logger at DEBUG and
+is off by default; set_upstream_tracing() switches it at runtime.
+
+Request errors quote the full URL, API key included, so every record has
+`apikey=` query values masked before it is written.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+UPSTREAM_LOGGER = 'upstream'
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+_listener = None
+_setup_lock = threading.Lock()
+
+_API_KEY_PARAM = re.compile(r'(apikey=)[^&\s\'"]+', re.IGNORECASE)
+
+
+def mask_api_keys(text):
+    """The text with the value of every apikey= query parameter replaced by ***"""
+    return _API_KEY_PARAM.sub(r'\1***', text)
+
+
+class MaskApiKeysFilter(logging.Filter):
+    """Masks API keys in the message and traceback of each record"""
+
+    def filter(self, record):
+        message = record.getMessage()
+        masked = mask_api_keys(message)
+        if masked != message:
+            record.msg, record.args = masked, None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        if record.exc_text:
+            record.exc_text = mask_api_keys(record.exc_text)
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `burst` records per message template through every `interval` seconds
+
+    Only records at `min_level` or above are limited. The first record
+    after a quiet period reports how many similar ones were dropped.
+    """
+
+    def __init__(self, interval=60.0, burst=5, min_level=logging.WARNING, clock=time.monotonic):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.min_level = min_level
+        self._clock = clock
+        self._windows = {}  # key -> [window_start, count, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.min_level:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = self._clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if len(self._windows) > 1000:
+                    self._prune(now)
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            record.msg = f"{record.msg} (suppressed {suppressed} similar messages)"
+        return True
+
+    def _prune(self, now):
+        for key in [key for key, window in self._windows.items() if now - window[0] >= self.interval]:
+            del self._windows[key]
+
+
+def configure_logging(level=None, stream=None):
+    """Install the queue-based handler on the root logger (once per process)
+
+    level defaults to LOG_LEVEL from the environment (INFO), and upstream
+    tracing starts enabled when LOG_UPSTREAM_TRACING is true.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        console = logging.StreamHandler(stream or sys.stdout)
+        console.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        records = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(records)
+        queue_handler.addFilter(RateLimitFilter(
+            interval=float(os.getenv('LOG_RATE_LIMIT_INTERVAL', 60)),
+            burst=int(os.getenv('LOG_RATE_LIMIT_BURST', 5))))
+        queue_handler.addFilter(MaskApiKeysFilter())
+
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+        root.setLevel(level or os.getenv('LOG_LEVEL', 'INFO').upper())
+        set_upstream_tracing(os.getenv('LOG_UPSTREAM_TRACING', 'false').lower() in ('1', 'true', 'yes'))
+
+        _listener = logging.handlers.QueueListener(records, console, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
+
+
+def set_upstream_tracing(enabled):
+    """Turn per-call AccuWeather logging on or off while the app runs"""
+    logging.getLogger(UPSTREAM_LOGGER).setLevel(logging.DEBUG if enabled else logging.INFO)
+
+
+def upstream_tracing_enabled():
+    return logging.getLogger(UPSTREAM_LOGGER).isEnabledFor(logging.DEBUG)
+
+
+def set_level(level):
+    """Change the application log level (a name such as 'DEBUG' or a number)"""
+    logging.getLogger().setLevel(level.upper() if isinstance(level, str) else level)
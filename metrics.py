@@ -0,0 +1,178 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are kept in memory with a label set per series
+and rendered by MetricsRegistry.render() for the /metrics endpoint.
+Values that already live elsewhere (cache statistics, budgets, circuit
+states) are exposed through callback gauges that are read at scrape
+time, so the hot path only pays for the timings it records.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        return [f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}"
+                for key, value in series]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block, also when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels):
+        """{'count', 'sum'} for one series"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return {'count': series['count'], 'sum': series['sum']} if series else {'count': 0, 'sum': 0.0}
+
+    def render(self):
+        with self._lock:
+            series = sorted((key, dict(value, buckets=list(value['buckets'])))
+                            for key, value in self._series.items())
+        lines = []
+        for key, value in series:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, value['buckets']):
+                cumulative += count
+                labels = _format_labels(pairs + [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(value['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {value['count']}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Gauge or counter whose samples come from a function at scrape time
+
+    The function returns a number, or a list of (labels dict, number).
+    """
+
+    def __init__(self, name, documentation, read, kind='gauge'):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self._read = read
+
+    def render(self):
+        samples = self._read()
+        if not isinstance(samples, list):
+            samples = [({}, samples)]
+        return [f"{self.name}{_format_labels(sorted(labels.items()))} {_format_value(value)}"
+                for labels, value in samples if value is not None]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name, documentation, read):
+        return self.register(CallbackMetric(name, documentation, read))
+
+    def counter_callback(self, name, documentation, read):
+        return self.register(CallbackMetric(name, documentation, read, kind='counter'))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = metric.render()
+            except Exception as e:
+                logger.warning("Could not collect metric %s: %s", metric.name, e)
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,176 @@
+"""
+On-demand profiling of single requests.
+
+A slow dashboard request can be profiled in production by asking for it
+(X-Profile header or ?profile=1, see app.py).  The request thread runs
+under cProfile, and so does any work it hands to the stage executor
+through ProfileSession.wrap(), so pandas time inside the CSV forecast
+shows up too.  The merged top functions are kept in memory for the admin
+endpoints.
+
+Profiling is deterministic and slows the profiled request down, so
+RequestProfiler runs at most one session at a time and at most one every
+`min_interval` seconds; requests beyond that are served unprofiled.
+"""
+
+import cProfile
+import itertools
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+_local = threading.local()
+
+
+def _short_path(filename):
+    """site-packages/pandas/core/frame.py -> pandas/core/frame.py, app code -> file name"""
+    for marker in ('site-packages' + os.sep, 'dist-packages' + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return os.path.basename(filename) if os.path.isabs(filename) else filename
+
+
+class ProfileSession:
+    """cProfile data for one request, collected from every thread that worked on it"""
+
+    def __init__(self, profile_id, label, clock=time.perf_counter):
+        self.id = profile_id
+        self.label = label
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._clock = clock
+        self._started = clock()
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._main = None
+
+    def _run_profiled(self, fn, *args, **kwargs):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler already covers this thread (cProfile is interpreter-wide on 3.12+)
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    def wrap(self, fn):
+        """fn profiled into this session, for running on another thread"""
+        def run(*args, **kwargs):
+            return self._run_profiled(fn, *args, **kwargs)
+        return run
+
+    def enable(self):
+        """Start profiling the calling (request) thread"""
+        self._main = cProfile.Profile()
+        try:
+            self._main.enable()
+        except ValueError:
+            self._main = None
+        _local.session = self
+
+    def disable(self):
+        if getattr(_local, 'session', None) is self:
+            _local.session = None
+        if self._main is not None:
+            self._main.disable()
+            with self._lock:
+                self._profiles.append(self._main)
+            self._main = None
+        return self._clock() - self._started
+
+    def summary(self, duration, top=25, sort='cumulative'):
+        """Top functions by cumulative (or 'tottime') seconds, JSON-ready"""
+        with self._lock:
+            profiles = list(self._profiles)
+        functions = []
+        total_calls = 0
+        if profiles:
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            total_calls = stats.total_calls
+            column = 3 if sort == 'cumulative' else 2
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][column], reverse=True)
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows[:top]:
+                functions.append({
+                    'function': name,
+                    'location': f"{_short_path(filename)}:{line}" if line else _short_path(filename),
+                    'calls': calls,
+                    'own_seconds': round(own, 6),
+                    'cumulative_seconds': round(cumulative, 6)
+                })
+        return {
+            'id': self.id,
+            'request': self.label,
+            'started_at': self.started_at,
+            'duration_seconds': round(duration, 6),
+            'threads_profiled': len(profiles),
+            'total_calls': total_calls,
+            'functions': functions
+        }
+
+
+def current_session():
+    """The session profiling the calling thread, if any"""
+    return getattr(_local, 'session', None)
+
+
+class RequestProfiler:
+    """Hands out rate-limited ProfileSessions and keeps the last `keep` summaries"""
+
+    def __init__(self, min_interval=30.0, keep=20, top=25, clock=time.monotonic):
+        self.min_interval = min_interval
+        self.top = top
+        self._clock = clock
+        self._profiles = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = None
+        self._last_started = None
+        self._stats = {'profiled': 0, 'skipped': 0}
+
+    def start(self, label):
+        """A running session for this request, or None when rate-limited"""
+        with self._lock:
+            now = self._clock()
+            if self._active is not None or (
+                    self._last_started is not None and now - self._last_started < self.min_interval):
+                self._stats['skipped'] += 1
+                return None
+            self._last_started = now
+            session = self._active = ProfileSession(next(self._ids), label)
+        session.enable()
+        return session
+
+    def finish(self, session):
+        """Stop the session and store its summary"""
+        duration = session.disable()
+        summary = session.summary(duration, top=self.top)
+        with self._lock:
+            if self._active is session:
+                self._active = None
+            self._profiles.append(summary)
+            self._stats['profiled'] += 1
+        return summary
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((p for p in self._profiles if p['id'] == profile_id), None)
+
+    def recent(self):
+        """Stored summaries, newest first, without the function tables"""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [{key: value for key, value in profile.items() if key != 'functions'}
+                for profile in reversed(profiles)]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, stored=len(self._profiles), min_interval_seconds=self.min_interval)
@@ -103,7 +103,7 @@ def main():
 - AI-powered viewing condition scoring (0-100 scale)
 - 3D animated starfield background with space theme
 - CSV export and data management functionality
-- Responsive design with auto-refresh every 5 minutes
+- Responsive design with live condition updates (Server-Sent Events)
 
 🚀 Ready to use: python app.py
 🌐 Access at: http://127.0.0.1:5000
@@ -0,0 +1,270 @@
+"""
+Caching and call accounting for upstream API responses.
+
+AccuWeather's free tier allows 50 calls per day, while a single dashboard
+load needs around ten of them.  ResponseCache keeps successful responses
+for a per-endpoint TTL and CallBudget stops upstream calls once the daily
+allowance is used up, so the app falls back to simulated data instead of
+failing every call for the rest of the day.
+
+With max_stale set, expired entries are kept for that much longer so the
+last good response can be served while a fresh one is fetched.
+
+Given a path, CallBudget keeps its count in a small SQLite file instead,
+so the web workers and a separate collector process share one allowance.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    __slots__ = ('value', 'stored_at', 'expires_at')
+
+    def __init__(self, value, stored_at, expires_at):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    def age(self, now=None):
+        return (now if now is not None else time.time()) - self.stored_at
+
+    def is_fresh(self, now=None):
+        return self.expires_at > (now if now is not None else time.time())
+
+
+class ResponseCache:
+    """Thread-safe TTL cache with LRU eviction and hit/miss statistics
+
+    get() only returns fresh entries; get_stale() also returns entries up
+    to max_stale seconds past their expiry.
+    """
+
+    def __init__(self, max_entries=256, default_ttl=600, max_stale=0, clock=time.time):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._stale_hits = 0
+
+    def _live_entry(self, key, now):
+        """Entry for key unless it is past the stale window (dropped then); lock held"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at + self.max_stale <= now:
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key):
+        """Return the live entry for key, or None if absent or expired"""
+        now = self._clock()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is None or not entry.is_fresh(now):
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def get_stale(self, key):
+        """Return the entry for key even if expired, while it is within max_stale"""
+        now = self._clock()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is not None and not entry.is_fresh(now):
+                self._stale_hits += 1
+            return entry
+
+    def set(self, key, value, ttl=None):
+        now = self._clock()
+        entry = CacheEntry(value, now, now + (self.default_ttl if ttl is None else ttl))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return entry
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'stale_hits': self._stale_hits,
+                'hit_ratio': round(self._hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class CallBudget:
+    """Counts upstream calls per calendar day against a daily limit
+
+    With `path` the count lives in SQLite, shared by every process using
+    the same file; the file is opened on first use. Calls the file cannot
+    record are counted by the process on its own.
+    """
+
+    def __init__(self, daily_limit, today=date.today, path=None):
+        self.daily_limit = daily_limit
+        self.path = path
+        self._today = today
+        self._day = today()
+        self._used = 0
+        self._rejected = 0
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _roll_over(self):
+        day = self._today()
+        if day != self._day:
+            self._day = day
+            self._used = 0
+            self._rejected = 0
+
+    def _connect(self):
+        """The shared counter's database, or None when counting in memory; lock held"""
+        if self.path is None:
+            return None
+        if self._db is None:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+                with self._db:
+                    self._db.execute(
+                        'CREATE TABLE IF NOT EXISTS call_budget ('
+                        'day TEXT PRIMARY KEY, used INTEGER NOT NULL, rejected INTEGER NOT NULL)')
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Shared call budget %s unavailable, counting in this process: %s", self.path, e)
+                self.path = None
+                return None
+        return self._db
+
+    def _shared_acquire(self, db, limit):
+        """Count one call (or one refusal) in the shared table; True if granted"""
+        day = self._day.isoformat()
+        with db:
+            db.execute('DELETE FROM call_budget WHERE day < ?', (day,))
+            db.execute('INSERT OR IGNORE INTO call_budget (day, used, rejected) VALUES (?, 0, 0)', (day,))
+            if limit is None:
+                granted = db.execute('UPDATE call_budget SET used = used + 1 WHERE day = ?', (day,)).rowcount
+            else:
+                granted = db.execute('UPDATE call_budget SET used = used + 1 WHERE day = ? AND used < ?',
+                                     (day, limit)).rowcount
+            if not granted:
+                db.execute('UPDATE call_budget SET rejected = rejected + 1 WHERE day = ?', (day,))
+        return bool(granted)
+
+    def try_acquire(self, reserve=0):
+        """Reserve one call; False when today's budget is already spent
+
+        `reserve` calls are left untouched for other callers: a caller
+        passing a reserve is refused once fewer than that many remain.
+        """
+        with self._lock:
+            self._roll_over()
+            limit = None if self.daily_limit is None else self.daily_limit - reserve
+            db = self._connect()
+            if db is not None:
+                try:
+                    return self._shared_acquire(db, limit)
+                except sqlite3.Error as e:
+                    logger.warning("Shared call budget %s failed, counting this call in process: %s", self.path, e)
+            if limit is not None and self._used >= limit:
+                self._rejected += 1
+                return False
+            self._used += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            self._roll_over()
+            used, rejected = self._used, self._rejected
+            db = self._connect()
+            if db is not None:
+                try:
+                    row = db.execute('SELECT used, rejected FROM call_budget WHERE day = ?',
+                                     (self._day.isoformat(),)).fetchone()
+                    used, rejected = row if row is not None else (0, 0)
+                except sqlite3.Error as e:
+                    logger.warning("Shared call budget %s failed: %s", self.path, e)
+            remaining = None if self.daily_limit is None else max(0, self.daily_limit - used)
+            return {
+                'date': self._day.isoformat(),
+                'used': used,
+                'limit': self.daily_limit,
+                'remaining': remaining,
+                'rejected': rejected,
+                'shared': self.path is not None
+            }
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution
+
+    The first caller runs the function; callers arriving while it is in
+    flight wait for it and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
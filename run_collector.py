@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Telescope Weather Snapshot Collector
+Takes weather snapshots for all locations on a fixed cadence, as a process
+of its own. Use this when the web app runs several workers: start one
+collector and set COLLECTOR_ENABLED=false for the web workers.
+"""
+
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Collect weather snapshots on a fixed cadence')
+    parser.add_argument('--interval', type=int, default=int(os.getenv('COLLECTOR_INTERVAL', 600)),
+                        help='seconds between snapshots (default: COLLECTOR_INTERVAL or 600)')
+    parser.add_argument('--once', action='store_true', help='take a single snapshot and exit')
+    args = parser.parse_args()
+
+    from app import collector
+
+    if args.once:
+        rows = collector.run_once()
+        print(f"📡 Saved {len(rows or [])} snapshot rows")
+        return
+
+    print("📡 Starting Telescope Weather Snapshot Collector...")
+    print(f"⏱️  Interval: {args.interval}s")
+    collector.interval = args.interval
+
+    try:
+        collector.run_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Collector stopped by user")
+        collector.stop()
+
+
+if __name__ == "__main__":
+    main()
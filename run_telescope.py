@@ -58,7 +58,7 @@ def main():
     
     print("\n🚀 Starting Flask application...")
     print("📍 App will be available at: http://127.0.0.1:5000")
-    print("🔄 Auto-refresh every 5 minutes")
+    print("🔄 Live conditions streamed; forecasts re-checked every 15 minutes")
     print("📊 Multiple locations supported")
     print("💾 Data export functionality included")
     print("\n" + "=" * 50)
@@ -66,7 +66,7 @@ def main():
     # Start the Flask app
     try:
         # Import and run the app
-        from app import app
+        from app import app, start_collector, warm_archive
         
         # Open browser after a short delay
         def open_browser():
@@ -76,6 +76,10 @@ def main():
         import threading
         threading.Thread(target=open_browser, daemon=True).start()
         
+        # Load the historical archive and take weather snapshots in the background
+        warm_archive()
+        start_collector()
+        
         # Run the app
         app.run(host='127.0.0.1', port=5000, debug=False)
         
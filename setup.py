@@ -40,6 +40,11 @@ setup(
             "flake8>=3.8",
             "mypy>=0.800",
         ],
+        "async": [
+            "asgiref>=3.7",
+            "httpx>=0.25",
+            "uvicorn>=0.23",
+        ],
     },
     entry_points={
         "console_scripts": [
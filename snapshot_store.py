@@ -0,0 +1,224 @@
+"""
+Storage for the periodic weather snapshots in current_weather_data.csv.
+
+Snapshots are only ever appended, so the writer opens the file in append
+mode and writes the new lines under an exclusive file lock instead of
+reading and rewriting the whole history each time.  The header is written
+once, when the file is created.
+
+Readers only need the most recent rows or a few summary figures, so the
+tail is read by seeking backwards from the end of the file and the
+summary lives in a small JSON manifest next to the CSV that the writer
+updates on every append.
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SNAPSHOT_FILE = 'current_weather_data.csv'
+SNAPSHOT_COLUMNS = ['datetime', 'location', 'temperature', 'humidity',
+                    'wind_speed', 'pressure', 'visibility', 'cloud_cover']
+
+
+@contextmanager
+def locked_file(fh):
+    """Hold an exclusive lock on an open file, across processes"""
+    if fcntl is not None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield fh
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    else:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield fh
+        finally:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SnapshotWriter:
+    """Append-only CSV writer with optional batching
+
+    With batch_size > 1 (or a flush_interval) rows are buffered in memory
+    and written together; call flush() before shutdown to keep them.
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE, columns=SNAPSHOT_COLUMNS, batch_size=1, flush_interval=None):
+        self.path = path
+        self.columns = list(columns)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+    def append(self, rows):
+        """Queue rows (dicts keyed by column) and write them when a batch is due"""
+        with self._lock:
+            self._pending.extend(rows)
+            due = len(self._pending) >= self.batch_size
+            if self.flush_interval is not None:
+                due = due or time.time() - self._last_flush >= self.flush_interval
+            if due:
+                self._write_pending()
+
+    def flush(self):
+        with self._lock:
+            self._write_pending()
+
+    def _encode(self, rows, header):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.columns, extrasaction='ignore', lineterminator='\n')
+        if header:
+            writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    def _write_pending(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        self._last_flush = time.time()
+
+        with open(self.path, 'a+b') as fh, locked_file(fh):
+            old_stat = os.fstat(fh.fileno())
+            size = fh.seek(0, os.SEEK_END)
+            prefix = b''
+            if size > 0:
+                fh.seek(size - 1)
+                if fh.read(1) != b'\n':
+                    prefix = b'\n'
+            fh.write(prefix + self._encode(rows, header=size == 0))
+            fh.flush()
+            update_manifest(self.path, rows, old_stat, os.fstat(fh.fileno()))
+
+
+def manifest_path(path):
+    return path + '.manifest.json'
+
+
+def _is_current(manifest, stat):
+    """True when the manifest describes the file as it is now (same size and mtime)"""
+    return manifest.get('size') == stat.st_size and manifest.get('mtime_ns') == stat.st_mtime_ns
+
+
+def _write_manifest(path, manifest):
+    target = manifest_path(path)
+    # A unique temp file per writer, so a reader rebuilding it cannot clash with an append
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target) or '.',
+                                    prefix=os.path.basename(target), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(manifest, fh)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _add_rows(manifest, rows):
+    locations = manifest['locations']
+    for row in rows:
+        if manifest['rows'] == 0:
+            manifest['first_datetime'] = row.get('datetime')
+        manifest['last_datetime'] = row.get('datetime')
+        manifest['rows'] += 1
+        if row.get('location') not in locations:
+            locations.append(row.get('location'))
+
+
+def build_manifest(path):
+    """Summarise a snapshot file with one full scan"""
+    # Stat first: rows appended during the scan leave the manifest out of date, not wrong
+    stat = os.stat(path)
+    manifest = {'rows': 0, 'first_datetime': None, 'last_datetime': None, 'locations': [],
+                'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    with open(path, 'r', newline='', encoding='utf-8') as fh:
+        _add_rows(manifest, csv.DictReader(fh))
+    return manifest
+
+
+def read_manifest(path):
+    """Return the summary for a snapshot file, rebuilding it if it is out of date
+
+    Raises FileNotFoundError when the snapshot file does not exist.
+    """
+    stat = os.stat(path)
+    try:
+        with open(manifest_path(path), 'r', encoding='utf-8') as fh:
+            manifest = json.load(fh)
+        if _is_current(manifest, stat):
+            return manifest
+    except (OSError, ValueError):
+        pass
+
+    manifest = build_manifest(path)
+    try:
+        _write_manifest(path, manifest)
+    except OSError:
+        pass
+    return manifest
+
+
+def update_manifest(path, rows, old_stat, new_stat):
+    """Fold newly appended rows into the manifest (called with the file lock held)
+
+    old_stat and new_stat are the file's stat before and after the append.
+    """
+    try:
+        with open(manifest_path(path), 'r', encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        manifest = None
+
+    if manifest is not None and _is_current(manifest, old_stat):
+        _add_rows(manifest, rows)
+        manifest['size'] = new_stat.st_size
+        manifest['mtime_ns'] = new_stat.st_mtime_ns
+    else:
+        manifest = build_manifest(path)
+    _write_manifest(path, manifest)
+
+
+def read_tail_lines(path, n, block_size=64 * 1024):
+    """Return the header line and the last n data lines, reading backwards"""
+    with open(path, 'rb') as fh:
+        header = fh.readline()
+        start = fh.tell()
+        pos = fh.seek(0, os.SEEK_END)
+
+        data = b''
+        while pos > start and data.count(b'\n') <= n:
+            step = min(block_size, pos - start)
+            pos -= step
+            fh.seek(pos)
+            data = fh.read(step) + data
+
+    lines = data.split(b'\n')
+    if pos > start:
+        lines = lines[1:]  # first piece is the end of an earlier line
+    lines = [line + b'\n' for line in lines if line.strip()]
+    return header, lines[-n:] if n > 0 else []
+
+
+def read_tail(path, n):
+    """Last n snapshot rows as a DataFrame, without reading the whole file"""
+    header, lines = read_tail_lines(path, n)
+    return pd.read_csv(io.BytesIO(header + b''.join(lines)))
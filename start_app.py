@@ -85,7 +85,7 @@ def main():
     # Start the Flask app
     print("\nStarting Telescope Weather App...")
     print("Location: http://127.0.0.1:5000")
-    print("The app will auto-refresh data every 5 minutes")
+    print("Current conditions update live; forecast and history data refresh every 15 minutes")
     print("CSV data export available at: http://127.0.0.1:5000/export/weather-data")
     print("\nTips:")
     print("  - Add your AccuWeather API key to .env file for live weather data")
@@ -97,7 +97,9 @@ def main():
     
     # Import and run the Flask app
     try:
-        from app import app
+        from app import app, start_collector, warm_archive
+        warm_archive(use_reloader=True)
+        start_collector(use_reloader=True)
         app.run(debug=True, host='127.0.0.1', port=5000)
     except KeyboardInterrupt:
         print("\nTelescope Weather App stopped")
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Test script for the dashboard API resources, using Flask's test client
+"""
+
+import logging
+import threading
+
+import app as telescope_app
+from app import app
+from logging_config import RateLimitFilter, upstream_tracing_enabled
+from metrics import MetricsRegistry
+from profiling import RequestProfiler
+from update_feed import UpdateFeed, parse_event_id, event_id
+
+
+def test_granular_resources_support_conditional_get():
+    """Each dashboard resource returns 304 for a matching ETag or date"""
+    client = app.test_client()
+    resources = {
+        '/api/locations/nainital/current': ['weather', 'prediction'],
+        '/api/locations/nainital/forecast': ['forecast', 'forecast_predictions'],
+        '/api/locations/nainital/hourly': ['hourly_today', 'hourly_predictions'],
+        '/api/history/summary': ['past_data', 'historical_records'],
+        '/api/snapshots': ['saved_weather_data']
+    }
+
+    for url, keys in resources.items():
+        first = client.get(url)
+        assert first.status_code == 200
+        assert all(key in first.get_json() for key in keys)
+        assert first.headers['ETag'] and first.headers['Last-Modified'] and first.headers['Cache-Control']
+
+        again = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+        assert again.status_code == 304 and again.data == b''
+
+        since = client.get(url, headers={'If-Modified-Since': first.headers['Last-Modified']})
+        assert since.status_code == 304
+
+        changed = client.get(url, headers={'If-None-Match': '"something-else"'})
+        assert changed.status_code == 200
+    print("✅ Dashboard resources support conditional GET")
+
+
+def test_history_summary_changes_at_midnight(monkeypatch):
+    """A copy fetched yesterday is not revalidated by date, as today's records differ"""
+    from datetime import datetime, timedelta
+    from werkzeug.http import http_date
+
+    telescope_app.archive.ensure_loaded()
+    monkeypatch.setattr(telescope_app.archive, 'loaded_at', datetime.now() - timedelta(days=2))
+    yesterday = http_date(datetime.now() - timedelta(days=1))
+    response = app.test_client().get('/api/history/summary', headers={'If-Modified-Since': yesterday})
+    assert response.status_code == 200
+    print("✅ History summary is modified at midnight")
+
+
+def test_current_resource_is_shared():
+    """Two clients get the same cached current-conditions payload"""
+    first = app.test_client().get('/api/locations/mumbai/current')
+    second = app.test_client().get('/api/locations/mumbai/current')
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.get_json() == second.get_json()
+    print("✅ Current conditions are built once and shared")
+
+
+def test_forecast_resource_falls_back_at_the_deadline(monkeypatch):
+    """A slow forecast fetch yields the CSV forecast within the deadline, cached only briefly"""
+    import time
+
+    def get_forecast_data(location):
+        time.sleep(2)
+        return []
+
+    monkeypatch.setattr(telescope_app, 'get_forecast_data', get_forecast_data)
+    monkeypatch.setattr(telescope_app, 'UPSTREAM_DEADLINE', 0.2)
+    telescope_app.resource_cache.invalidate(('forecast', 'delhi'))
+    telescope_app.resource_cache.invalidate(('current', 'delhi'))
+
+    start = time.time()
+    response = app.test_client().get('/api/locations/delhi/forecast')
+    elapsed = time.time() - start
+    assert response.status_code == 200
+    assert response.get_json()['forecast']  # the CSV forecast, not the empty slow result
+    assert elapsed < 1.5
+    entry = telescope_app.resource_cache.get(('forecast', 'delhi'))
+    assert entry.expires_at - entry.stored_at == telescope_app.STALE_RESOURCE_TTL
+    telescope_app.resource_cache.invalidate(('forecast', 'delhi'))
+    print(f"✅ Forecast resource falls back at the deadline ({elapsed:.2f}s)")
+
+
+def test_update_feed_only_bumps_on_change():
+    """Publishing identical data does not wake subscribers"""
+    feed = UpdateFeed()
+    assert feed.publish('nainital', {'temperature': 10})
+    assert not feed.publish('nainital', {'temperature': 10})
+    assert feed.latest('nainital') == (1, {'temperature': 10})
+    assert feed.wait('nainital', 1, timeout=0.05) is None
+
+    threading.Timer(0.05, feed.publish, ('nainital', {'temperature': 11})).start()
+    assert feed.wait('nainital', 1, timeout=2) == (2, {'temperature': 11})
+
+    updates = feed.subscribe('nainital', after_version=2, heartbeat=0.05)
+    assert next(updates) is None  # heartbeat
+    feed.publish('nainital', {'temperature': 12})
+    assert next(updates) == (3, {'temperature': 12})
+    assert feed.stats()['subscribers'] == 1
+    updates.close()
+    assert feed.stats()['subscribers'] == 0
+
+    assert parse_event_id(event_id(7)) == 7
+    assert parse_event_id('stale-7') == 0 and parse_event_id(None) == 0
+    print("✅ Update feed publishes changes only")
+
+
+def test_stream_pushes_changed_conditions(monkeypatch):
+    """/api/stream sends the current conditions, then each change"""
+    response = app.test_client().get('/api/stream/delhi', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+
+    assert next(chunks).startswith(b'retry:')
+    first = next(chunks).decode()
+    assert first.startswith('id: ') and 'event: conditions' in first
+
+    weather = dict(telescope_app.conditions_feed.latest('delhi')[1]['weather'], current_time='later')
+    assert not telescope_app.conditions_feed.publish('delhi', {'weather': weather, 'prediction': {}})
+
+    weather['temperature'] += 1
+    threading.Timer(0.05, telescope_app.publish_conditions, ('delhi', weather)).start()
+    second = next(chunks).decode()
+    assert f'"temperature": {weather["temperature"]}' in second or f'"temperature":{weather["temperature"]}' in second
+    response.close()
+    print("✅ Stream pushes only changed conditions")
+
+
+def test_stream_refreshes_expired_conditions(monkeypatch):
+    """Without a collector, an idle stream rebuilds expired conditions and pushes the change"""
+    def collector_started(*args, **kwargs):
+        raise AssertionError('streams must not start a collector')
+
+    monkeypatch.setattr(telescope_app, 'start_collector', collector_started)
+    monkeypatch.setattr(telescope_app, 'SSE_HEARTBEAT', 0.05)
+    response = app.test_client().get('/api/stream/mumbai', buffered=False)
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    assert b'event: conditions' in next(chunks)
+
+    weather = dict(telescope_app.conditions_feed.latest('mumbai')[1]['weather'])
+    weather['temperature'] += 5
+    monkeypatch.setattr(telescope_app, 'get_current_and_today_weather', lambda location: dict(weather))
+    telescope_app.resource_cache.invalidate(('current', 'mumbai'))
+
+    events = [next(chunks).decode() for _ in range(2)]
+    assert events[0].startswith(': keepalive')
+    assert 'event: conditions' in events[1] and str(weather['temperature']) in events[1]
+    response.close()
+    telescope_app.resource_cache.invalidate(('current', 'mumbai'))
+    print("✅ Streams refresh expired conditions on their own")
+
+
+def test_batch_conditions():
+    """Several sites in one request, sharing the per-location resources"""
+    client = app.test_client()
+    response = client.get('/api/conditions?locations=nainital,delhi,nainital&include=forecast')
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert sorted(data['locations']) == ['delhi', 'nainital']
+    for site in data['locations'].values():
+        assert {'weather', 'prediction', 'forecast', 'forecast_predictions'} <= set(site)
+    assert [site['score'] for site in data['ranking']] == sorted(
+        (site['prediction']['score'] for site in data['locations'].values()), reverse=True)
+
+    single = client.get('/api/locations/delhi/current').get_json()
+    assert single == {key: data['locations']['delhi'][key] for key in ('weather', 'prediction')}
+
+    assert set(client.get('/api/conditions').get_json()['locations']) == set(telescope_app.LOCATIONS)
+    assert client.get('/api/conditions?locations=atlantis').status_code == 400
+    assert client.get('/api/conditions?include=radar').status_code == 400
+    print("✅ Batch endpoint returns every requested site")
+
+
+def test_batch_conditions_share_one_deadline(monkeypatch):
+    """Slow upstreams delay a batch by one deadline, not one per included resource"""
+    import time
+
+    def slow(location):
+        time.sleep(2)
+        return []
+
+    for name in ('get_current_and_today_weather', 'get_forecast_data', 'get_hourly_today_weather'):
+        monkeypatch.setattr(telescope_app, name, slow)
+    monkeypatch.setattr(telescope_app, 'UPSTREAM_DEADLINE', 0.3)
+    resources = [(name, 'mumbai') for name in ('current', 'forecast', 'hourly')]
+    for key in resources:
+        telescope_app.resource_cache.invalidate(key)
+
+    start = time.time()
+    response = app.test_client().get('/api/conditions?locations=mumbai&include=forecast,hourly')
+    elapsed = time.time() - start
+    assert response.status_code == 200
+    assert {'weather', 'forecast', 'hourly_today'} <= set(response.get_json()['locations']['mumbai'])
+    assert elapsed < 0.75
+    for key in resources:
+        telescope_app.resource_cache.invalidate(key)
+    print(f"✅ Batch conditions share one deadline ({elapsed:.2f}s)")
+
+
+def test_histogram_renders_prometheus_text():
+    """Buckets are cumulative and labels are escaped"""
+    registry = MetricsRegistry()
+    latency = registry.histogram('demo_seconds', 'Demo latency', ['stage'], buckets=(0.1, 1.0))
+    latency.observe(0.05, stage='a"b')
+    latency.observe(0.5, stage='a"b')
+    latency.observe(5, stage='a"b')
+    registry.gauge_callback('demo_ratio', 'Demo ratio', lambda: [({'cache': 'x'}, 0.5)])
+
+    text = registry.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{stage="a\\"b",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="a\\"b",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="a\\"b",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="a\\"b"} 3' in text
+    assert 'demo_ratio{cache="x"} 0.5' in text
+    print("✅ Metrics render in the Prometheus text format")
+
+
+def test_metrics_endpoint_reports_dashboard_stages():
+    """Each dashboard stage and the request itself show up in /metrics"""
+    client = app.test_client()
+    assert client.get('/api/telescope-conditions/nainital').status_code == 200
+
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    for stage in ('current_weather', 'forecast', 'hourly', 'scoring', 'past_data',
+                  'historical_records', 'snapshot_read', 'serialize'):
+        assert f'telescope_stage_seconds_count{{stage="{stage}"}}' in text, stage
+    assert 'route="/api/telescope-conditions/<location>"' in text
+    assert 'telescope_cache_hit_ratio{cache="upstream"}' in text
+    assert 'telescope_circuit_state{family="current"}' in text
+    print("✅ /metrics reports per-stage dashboard timings")
+
+
+def test_rate_limit_filter_suppresses_repeats():
+    """Past the burst a repeated warning is dropped, and the next window reports the count"""
+    now = [0.0]
+    limiter = RateLimitFilter(interval=60, burst=2, clock=lambda: now[0])
+
+    def record(level=logging.WARNING, msg="Upstream failed: %s"):
+        return logging.LogRecord('app', level, __file__, 1, msg, ('boom',), None)
+
+    assert [limiter.filter(record()) for _ in range(5)] == [True, True, False, False, False]
+    assert limiter.filter(record(msg="Another message")), "templates are limited separately"
+    assert limiter.filter(record(level=logging.INFO)), "INFO is never limited"
+
+    now[0] = 61
+    resumed = record()
+    assert limiter.filter(resumed)
+    assert resumed.getMessage() == "Upstream failed: boom (suppressed 3 similar messages)"
+    print("✅ Repeated warnings are rate-limited")
+
+
+def test_admin_logging_endpoint(monkeypatch):
+    """Upstream tracing can be switched at runtime with the admin token only"""
+    client = app.test_client()
+    monkeypatch.setattr(telescope_app, 'ADMIN_TOKEN', 'secret')
+    assert client.get('/api/admin/logging').status_code == 403
+    assert client.get('/api/admin/logging', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+
+    headers = {'X-Admin-Token': 'secret'}
+    try:
+        response = client.post('/api/admin/logging', json={'upstream_tracing': True}, headers=headers)
+        assert response.status_code == 200 and response.get_json()['upstream_tracing'] is True
+        assert upstream_tracing_enabled()
+        assert client.post('/api/admin/logging', json={'level': 'NOISY'}, headers=headers).status_code == 400
+    finally:
+        client.post('/api/admin/logging', json={'upstream_tracing': False}, headers=headers)
+    assert not upstream_tracing_enabled()
+    print("✅ Admin endpoint toggles upstream tracing")
+
+
+def test_profiled_request_reports_top_functions(monkeypatch):
+    """A dashboard request asked to be profiled stores its functions, including stage threads"""
+    client = app.test_client()
+    monkeypatch.setattr(telescope_app, 'ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(telescope_app, 'PROFILING_ENABLED', False)
+    monkeypatch.setattr(telescope_app, 'request_profiler', RequestProfiler(min_interval=60, top=1000))
+    headers = {'X-Admin-Token': 'secret', 'X-Profile': '1'}
+
+    response = client.get('/api/telescope-conditions/nainital', headers={'X-Profile': '1'})
+    assert 'X-Profile-Id' not in response.headers, "profiling needs the token or the flag"
+
+    response = client.get('/api/telescope-conditions/nainital', headers=headers)
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+    again = client.get('/api/telescope-conditions/nainital', headers=headers)
+    assert 'X-Profile-Id' not in again.headers, "a second profile within the interval is skipped"
+
+    admin = {'X-Admin-Token': 'secret'}
+    profile = client.get(f'/api/admin/profiles/{profile_id}', headers=admin).get_json()
+    names = {row['function'] for row in profile['functions']}
+    assert 'telescope_conditions' in names
+    assert 'get_forecast_data' in names, "work on the stage executor is profiled too"
+    assert profile['threads_profiled'] > 1
+
+    listing = client.get('/api/admin/profiles', headers=admin).get_json()
+    assert [p['id'] for p in listing['profiles']] == [int(profile_id)]
+    assert listing['profiler']['skipped'] == 1
+    assert client.get('/api/admin/profiles').status_code == 403
+
+    monkeypatch.setattr(telescope_app, 'PROFILING_ENABLED', True)
+    assert client.get('/api/admin/profiles').status_code == 403, "the flag does not open the admin views"
+    assert client.get(f'/api/admin/profiles/{profile_id}').status_code == 403
+    print("✅ Profiled requests store their top functions")
+
+
+def test_historical_records_round_like_the_archive(monkeypatch):
+    """Readings stored as float32 are rounded from their decimal text, as before"""
+    import pandas as pd
+    from datetime import datetime
+    from historical_data import HistoricalArchive, compact_frame
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    frame = compact_frame(pd.DataFrame({
+        'DATE(IST)': [today.replace(year=2016)],
+        'AIR_TEMP(°C)': [12.25], 'HUMIDITY(%)': [40.05], 'WIND_SPEED(m/s)': [0.65], 'ATMO_PRESSURE(hpa)': [965.35]
+    }))
+    monkeypatch.setattr(telescope_app, 'archive', HistoricalArchive('archive.csv', loader=lambda path: frame))
+
+    records = telescope_app.get_historical_records_for_today()
+    assert records == [{'date': f'2016-{today:%m-%d}', 'temp': round(12.25, 1), 'humidity': round(40.05, 1),
+                        'wind': round(0.65, 1), 'pressure': round(965.35, 1)}]
+    print("✅ Historical records round like the archive values")
+
+
+if __name__ == "__main__":
+    print("🔭 Telescope Weather App - API Resource Test")
+    print("=" * 50)
+    test_granular_resources_support_conditional_get()
+    test_current_resource_is_shared()
+    test_update_feed_only_bumps_on_change()
+    test_batch_conditions()
+    test_histogram_renders_prometheus_text()
+    test_metrics_endpoint_reports_dashboard_stages()
+    test_rate_limit_filter_suppresses_repeats()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the ASGI serving mode (needs requirements-async.txt)
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+pytest.importorskip('asgiref')
+
+import app as telescope_app
+import asgi
+
+
+def get(path):
+    async def request():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            return await client.get(path)
+    return asyncio.run(request())
+
+
+def test_dashboard_payload_matches_flask():
+    """The async dashboard returns the same keys as the Flask route"""
+    async_response = get('/api/telescope-conditions/nainital')
+    flask_response = telescope_app.app.test_client().get('/api/telescope-conditions/nainital')
+
+    assert async_response.status_code == 200
+    assert async_response.headers['content-type'] == 'application/json'
+    assert set(async_response.json()) == set(flask_response.get_json())
+    print("✅ Async dashboard payload matches the Flask endpoint")
+
+
+def test_other_routes_are_served_by_flask():
+    """Routes without an async handler go through the WSGI adapter"""
+    response = get('/api/upstream-status')
+    assert response.status_code == 200
+    assert 'response_cache' in response.json()
+    print("✅ Other routes are delegated to Flask")
+
+
+def test_upstream_calls_overlap(monkeypatch):
+    """Current, forecast and hourly calls wait on the upstream together"""
+    calls = []
+
+    async def slow_fetch_entry(endpoint, path, params=None, timeout=10):
+        calls.append(path)
+        await asyncio.sleep(0.2)
+        return None
+
+    monkeypatch.setattr(telescope_app, 'ACCUWEATHER_API_KEY', 'test-key')
+    monkeypatch.setattr(asgi.accuweather, 'fetch_entry', slow_fetch_entry)
+
+    started = time.time()
+    payload = asyncio.run(asgi.dashboard_payload('nainital'))
+    elapsed = time.time() - started
+
+    assert len(calls) == 4  # current, 1-day, 5-day and hourly
+    assert elapsed < 0.6
+    assert payload['weather']['api_source'].startswith('Enhanced Simulation')
+    print(f"✅ {len(calls)} upstream calls overlapped ({elapsed:.2f}s)")
+
+
+def test_location_keys_use_the_store(monkeypatch, tmp_path):
+    """Async lookups go through the location store, stats included, and search once"""
+    from location_store import LocationKeyStore
+
+    store = LocationKeyStore(str(tmp_path / 'keys.sqlite3'))
+    searches = []
+
+    async def search(city_name):
+        searches.append(city_name)
+        return None if city_name == 'Atlantis' else 'key-almora'
+
+    monkeypatch.setattr(telescope_app, 'ACCUWEATHER_API_KEY', 'test-key')
+    monkeypatch.setattr(telescope_app, 'get_location_store', lambda: store)
+    monkeypatch.setattr(asgi, 'search_location_key_async', search)
+
+    async def lookups():
+        return [await asgi.get_location_key_async(city) for city in ('Almora', 'Almora', 'Atlantis', 'Atlantis')]
+
+    assert asyncio.run(lookups()) == ['key-almora', 'key-almora', None, None]
+    assert searches == ['Almora', 'Atlantis']
+    stats = store.stats()
+    assert stats['searches'] == 2 and stats['memory_hits'] == 2 and stats['negative_hits'] == 1
+    store.close()
+    print("✅ Async location keys share the store and its stats")
+
+
+def test_csv_forecast_runs_off_the_loop(monkeypatch):
+    """The CSV forecast, as fetcher result or as fallback, never blocks the event loop"""
+    threads = []
+    real_forecast = telescope_app.generate_forecast_from_csv
+
+    def recording_forecast(location='beluwakhan', days=5):
+        threads.append(threading.current_thread())
+        return real_forecast(location, days)
+
+    async def failing():
+        raise RuntimeError('upstream down')
+
+    async def run():
+        forecast = await asgi.get_forecast_data_async('nainital')
+        results = await asgi.run_concurrently_async({
+            'forecast': (failing(), lambda: asyncio.to_thread(recording_forecast, 'nainital'))})
+        return forecast, results['forecast'], threading.current_thread()
+
+    monkeypatch.setattr(telescope_app, 'ACCUWEATHER_API_KEY', None)
+    monkeypatch.setattr(telescope_app, 'generate_forecast_from_csv', recording_forecast)
+    forecast, fallback, loop_thread = asyncio.run(run())
+
+    assert forecast and fallback
+    assert len(threads) == 2 and loop_thread not in threads
+    print("✅ CSV forecasts run on worker threads")
+
+
+if __name__ == "__main__":
+    print("🔭 Telescope Weather App - ASGI Test")
+    print("=" * 50)
+    test_dashboard_payload_matches_flask()
+    test_other_routes_are_served_by_flask()
+    pytest.main([__file__, '-q', '-k', 'overlap'])
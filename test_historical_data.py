@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test script for historical archive loading and the columnar snapshot
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from historical_data import (ClimatologyIndex, HistoricalArchive, load_historical_data, memory_usage,
+                             parse_dates, snapshot_path)
+
+
+def write_sample_archive(path, rows=500):
+    """Write a small ISRO-format CSV mixing all supported date formats"""
+    dates = pd.date_range('2015-01-01', periods=rows, freq='6h')
+    formats = ['%m-%d-%Y', '%m/%d/%Y', '%Y-%m-%d', '%d-%m-%Y']
+    rng = np.random.default_rng(1)
+    sample = pd.DataFrame({
+        'SID': 'ISRO0019',
+        'DATE(IST)': [d.strftime(formats[i % 4]) for i, d in enumerate(dates)],
+        'AIR_TEMP(°C)': rng.normal(14, 6, rows).round(1),
+        'HUMIDITY(%)': rng.uniform(20, 100, rows).round(1),
+        'WIND_SPEED(m/s)': rng.gamma(2, 1.2, rows).round(2),
+        'ATMO_PRESSURE(hpa)': rng.normal(966, 4, rows).round(1),
+    })
+    sample.loc[3, 'DATE(IST)'] = 'not a date'
+    sample.to_csv(path, index=False)
+    return sample
+
+
+def test_parse_dates_matches_row_by_row():
+    """Vectorized parsing gives the same dates as trying each format per row"""
+    values = pd.Series(['01-02-2015', '01/02/2015', '2015-01-02', '13-02-2015', 'bad', '02-13-2015'])
+
+    def parse_one(value):
+        for fmt in ['%m-%d-%Y', '%m/%d/%Y', '%Y-%m-%d', '%d-%m-%Y']:
+            try:
+                return pd.to_datetime(value, format=fmt)
+            except Exception:
+                continue
+        return pd.NaT
+
+    expected = values.apply(parse_one)
+    assert parse_dates(values).equals(expected)
+    print("✅ Vectorized date parsing matches row-by-row parsing")
+
+
+def test_snapshot_round_trip():
+    """A second load comes from the snapshot and is identical to the first"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'archive.csv')
+        cache_dir = os.path.join(tmp, 'cache')
+        write_sample_archive(csv_path)
+
+        first = load_historical_data(csv_path, cache_dir=cache_dir)
+        assert len(first) == 499
+        assert os.path.exists(snapshot_path(csv_path, cache_dir))
+
+        second = load_historical_data(csv_path, cache_dir=cache_dir)
+        pd.testing.assert_frame_equal(first, second)
+    print("✅ Snapshot round trip preserves the cleaned frame")
+
+
+def test_archive_is_compact():
+    """Only the needed columns stay resident, as float32 under a sorted date index"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'archive.csv')
+        sample = write_sample_archive(csv_path, rows=2000)
+        sample['TIME(IST)'] = '00:00'
+        sample.to_csv(csv_path, index=False)
+        data = load_historical_data(csv_path, use_cache=False)
+
+    assert list(data.columns) == ['SID', 'AIR_TEMP(°C)', 'HUMIDITY(%)', 'WIND_SPEED(m/s)', 'ATMO_PRESSURE(hpa)']
+    assert isinstance(data.index, pd.DatetimeIndex) and data.index.name == 'DATE(IST)'
+    assert data.index.is_monotonic_increasing
+    assert data['SID'].dtype == 'category'
+    assert all(data[col].dtype == np.float32 for col in data.columns[1:])
+    assert memory_usage(data) < memory_usage(sample) / 3
+    print("✅ Archive is held in its compact form")
+
+
+def test_damaged_snapshot_is_rebuilt():
+    """A truncated snapshot is ignored and the CSV parsed again"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'archive.csv')
+        cache_dir = os.path.join(tmp, 'cache')
+        write_sample_archive(csv_path)
+        first = load_historical_data(csv_path, cache_dir=cache_dir)
+
+        cache_file = snapshot_path(csv_path, cache_dir)
+        with open(cache_file, 'r+b') as fh:
+            fh.truncate(os.path.getsize(cache_file) // 2)
+        pd.testing.assert_frame_equal(load_historical_data(csv_path, cache_dir=cache_dir), first)
+        assert os.listdir(cache_dir) == [os.path.basename(cache_file)], "no temp files are left behind"
+    print("✅ Damaged snapshot is rebuilt from the CSV")
+
+
+def test_snapshot_invalidated_on_change():
+    """Changing the source file makes the snapshot stale"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'archive.csv')
+        cache_dir = os.path.join(tmp, 'cache')
+        write_sample_archive(csv_path, rows=100)
+        assert len(load_historical_data(csv_path, cache_dir=cache_dir)) == 99
+
+        write_sample_archive(csv_path, rows=200)
+        assert len(load_historical_data(csv_path, cache_dir=cache_dir)) == 199
+    print("✅ Snapshot is rebuilt when the source CSV changes")
+
+
+def test_climatology_index_matches_masks():
+    """Bucket rows and aggregates agree with full-frame month/day masks"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'archive.csv')
+        write_sample_archive(csv_path, rows=3000)
+        data = load_historical_data(csv_path, use_cache=False)
+
+    index = ClimatologyIndex(data)
+    dates = data.index
+
+    mask = (dates.month == 3) & (dates.day == 15)
+    assert list(index.rows(3, 15)) == list(np.flatnonzero(mask))
+    assert list(index.month_rows(3)) == list(np.flatnonzero(dates.month == 3))
+
+    # A ±3 day window around 1 March spans the end of February
+    window = (dates.month == 2) & (dates.day >= 27) | (dates.month == 3) & (dates.day <= 4)
+    stats = index.stats(3, 1, days=3)
+    assert stats['rows'] == int(window.sum())
+    for col in ['AIR_TEMP(°C)', 'HUMIDITY(%)', 'WIND_SPEED(m/s)', 'ATMO_PRESSURE(hpa)']:
+        assert np.isclose(stats['mean'][col], data.loc[window, col].mean())
+        assert np.isclose(stats['std'][col], data.loc[window, col].std())
+        assert stats['count'][col] == data.loc[window, col].count()
+    print("✅ Climatology index matches full-frame filtering")
+
+
+def test_archive_summary_memoized_per_version():
+    """Summaries match a direct computation and are rebuilt only on reload"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'archive.csv')
+        write_sample_archive(csv_path, rows=3000)
+        archive = HistoricalArchive(csv_path, loader=lambda path: load_historical_data(path, use_cache=False))
+        data = archive.frame
+
+        optimal = data[(data['HUMIDITY(%)'] < 70) & (data['WIND_SPEED(m/s)'] < 3) &
+                       (data['ATMO_PRESSURE(hpa)'] > 960) & data['AIR_TEMP(°C)'].between(5, 20)]
+        summary = archive.summary()
+        assert summary == {
+            'total_records': len(data),
+            'optimal_days': len(optimal),
+            'optimal_percentage': round(len(optimal) / len(data) * 100, 1),
+            'avg_temp': round(data['AIR_TEMP(°C)'].astype(float).mean(), 1),
+            'avg_humidity': round(data['HUMIDITY(%)'].astype(float).mean(), 1),
+            'avg_wind': round(data['WIND_SPEED(m/s)'].astype(float).mean(), 1),
+            'avg_pressure': round(data['ATMO_PRESSURE(hpa)'].astype(float).mean(), 1)
+        }
+
+        years = archive.breakdown('year')
+        assert [row['year'] for row in years] == sorted(data.index.year.unique())
+        assert sum(row['total_records'] for row in years) == len(data)
+        months = archive.breakdown('month')
+        assert sum(row['optimal_days'] for row in months) == len(optimal)
+
+        assert archive.derived('summary', None) is archive.derived('summary', None)
+        write_sample_archive(csv_path, rows=100)
+        assert archive.reload() == 2
+        assert archive.summary()['total_records'] == 99
+    print("✅ Archive summaries are memoized per data version")
+
+
+def test_archive_loads_once_on_first_use():
+    """Creating the archive reads nothing; concurrent first users share one load"""
+    calls = []
+
+    def slow_loader(path):
+        calls.append(path)
+        time.sleep(0.05)
+        return pd.DataFrame({'AIR_TEMP(°C)': [1.0, 2.0]})
+
+    archive = HistoricalArchive('archive.csv', loader=slow_loader)
+    assert calls == [] and not archive.loaded and archive.status()['records'] is None
+
+    threads = [threading.Thread(target=lambda: archive.frame) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ['archive.csv'] and archive.version == 1 and archive.status()['records'] == 2
+
+    warm = HistoricalArchive('archive.csv', loader=slow_loader)
+    warm.warm_up(derived=()).join(timeout=5)
+    assert warm.loaded and warm.warm_up() is warm.warm_up()
+    print("✅ Archive loads once, lazily or in the background")
+
+
+if __name__ == "__main__":
+    print("🔭 Telescope Weather App - Historical Data Test")
+    print("=" * 50)
+    test_parse_dates_matches_row_by_row()
+    test_snapshot_round_trip()
+    test_archive_is_compact()
+    test_damaged_snapshot_is_rebuilt()
+    test_snapshot_invalidated_on_change()
+    test_climatology_index_matches_masks()
+    test_archive_summary_memoized_per_version()
+    test_archive_loads_once_on_first_use()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test script checking batch telescope scoring against the scalar version
+"""
+
+import itertools
+
+import numpy as np
+
+from app import predict_telescope_conditions, score_telescope_conditions_batch, TELESCOPE_FACTORS
+
+
+def test_batch_matches_scalar():
+    """Every combination of boundary readings scores the same both ways"""
+    temperatures = [-5, 4.9, 5, 12, 20, 20.1, np.nan]
+    humidities = [30, 69.9, 70, 95, np.nan]
+    winds = [0, 2.9, 3, 8]
+    pressures = [900, 960, 960.1, 1013]
+    readings = list(itertools.product(temperatures, humidities, winds, pressures))
+
+    batch = score_telescope_conditions_batch(*zip(*readings))
+
+    for i, (t, h, w, p) in enumerate(readings):
+        scalar = predict_telescope_conditions({'temperature': t, 'humidity': h, 'wind_speed': w, 'pressure': p})
+        assert scalar['score'] == batch['score'][i]
+        assert scalar['recommendation'] == batch['recommendation'][i]
+        for (flag, good, bad), factor in zip(TELESCOPE_FACTORS, scalar['factors']):
+            assert factor == (good if batch[flag][i] else bad)
+    print(f"✅ Batch scoring matches scalar scoring for {len(readings)} readings")
+
+
+def test_batch_broadcasts_scalars():
+    """A single pressure value applies to every row"""
+    result = score_telescope_conditions_batch([10, 25], [50, 50], [1, 1], 1000)
+    assert result['score'].tolist() == [100, 75]
+    assert result['recommendation'].tolist() == ['Excellent', 'Excellent']
+    print("✅ Batch scoring broadcasts scalar inputs")
+
+
+if __name__ == "__main__":
+    print("🔭 Telescope Weather App - Scoring Test")
+    print("=" * 50)
+    test_batch_matches_scalar()
+    test_batch_broadcasts_scalars()
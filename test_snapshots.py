@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test script for the append-only weather snapshot store
+"""
+
+import gzip
+import io
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+import pandas as pd
+
+from collector import SnapshotCollector
+from snapshot_store import SNAPSHOT_COLUMNS, SnapshotWriter, read_manifest, read_tail, read_tail_lines
+
+
+def make_rows(n, label='Beluwakhan'):
+    return [{
+        'datetime': f'2025-11-12 18:{i % 60:02d}:00',
+        'location': label,
+        'temperature': 11.8,
+        'humidity': 50,
+        'wind_speed': 1.9444444444444444,
+        'pressure': 1016.3,
+        'visibility': 4.8,
+        'cloud_cover': 51
+    } for i in range(n)]
+
+
+def test_writer_appends_with_single_header():
+    """Concurrent appends keep every row and write the header once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshots.csv')
+        writer = SnapshotWriter(path)
+
+        threads = [threading.Thread(target=writer.append, args=(make_rows(4, f'Site{i}'),)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        saved = pd.read_csv(path)
+        assert list(saved.columns) == SNAPSHOT_COLUMNS
+        assert len(saved) == 32
+        assert saved['wind_speed'].iloc[0] == 1.9444444444444444
+    print("✅ Snapshot writer appends rows with a single header")
+
+
+def test_writer_batches_rows():
+    """Rows stay buffered until a batch is full or flush() is called"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshots.csv')
+        writer = SnapshotWriter(path, batch_size=8)
+
+        writer.append(make_rows(4))
+        assert not os.path.exists(path)
+        writer.append(make_rows(4))
+        assert len(pd.read_csv(path)) == 8
+
+        writer.append(make_rows(2))
+        writer.flush()
+        assert len(pd.read_csv(path)) == 10
+    print("✅ Snapshot writer batches rows until flushed")
+
+
+def test_writer_extends_existing_file():
+    """Appending to a file without a trailing newline keeps rows separate"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshots.csv')
+        pd.DataFrame(make_rows(3)).to_csv(path, index=False)
+        with open(path, 'rb+') as fh:
+            fh.truncate(os.path.getsize(path) - 1)
+
+        SnapshotWriter(path).append(make_rows(2))
+        assert len(pd.read_csv(path)) == 5
+    print("✅ Snapshot writer extends an existing file")
+
+
+def test_tail_reader_matches_full_read():
+    """Reading backwards gives the same last rows as loading the whole file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshots.csv')
+        writer = SnapshotWriter(path)
+        for i in range(50):
+            writer.append(make_rows(4, f'Site{i}'))
+
+        full = pd.read_csv(path)
+        for n in (1, 20, 200, 500):
+            pd.testing.assert_frame_equal(read_tail(path, n), full.tail(n).reset_index(drop=True))
+
+        _, lines = read_tail_lines(path, 7, block_size=64)
+        assert len(lines) == 7
+    print("✅ Tail reader matches a full read")
+
+
+def test_manifest_tracks_appends():
+    """The manifest follows appends and is rebuilt after outside edits"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshots.csv')
+        writer = SnapshotWriter(path)
+        writer.append(make_rows(3, 'Delhi'))
+        writer.append(make_rows(2, 'Mumbai'))
+
+        manifest = read_manifest(path)
+        assert manifest['rows'] == 5
+        assert manifest['locations'] == ['Delhi', 'Mumbai']
+        assert manifest['first_datetime'] == '2025-11-12 18:00:00'
+        assert manifest['last_datetime'] == '2025-11-12 18:01:00'
+
+        pd.DataFrame(make_rows(6, 'Nainital')).to_csv(path, index=False)
+        manifest = read_manifest(path)
+        assert manifest['rows'] == 6 and manifest['locations'] == ['Nainital']
+
+        # Same size, different content: only the modification time tells
+        pd.DataFrame(make_rows(6, 'Nainital')[::-1]).to_csv(path, index=False)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert os.path.getsize(path) == manifest['size']
+        assert read_manifest(path)['first_datetime'] == '2025-11-12 18:05:00'
+        assert sorted(os.listdir(tmp)) == ['snapshots.csv', 'snapshots.csv.manifest.json']
+    print("✅ Snapshot manifest tracks appends")
+
+
+def test_collector_runs_on_cadence():
+    """The collector calls its job repeatedly in the background and keeps the latest rows"""
+    calls = []
+
+    def collect():
+        calls.append(time.time())
+        return make_rows(4, f'Run{len(calls)}')
+
+    collector = SnapshotCollector(collect, interval=0.05)
+    assert collector.start()
+    assert not collector.start()
+    time.sleep(0.3)
+    collector.stop(timeout=1)
+
+    assert not collector.is_running
+    assert len(calls) >= 3
+    status = collector.status()
+    assert status['runs'] == len(calls)
+    assert status['latest'][0]['location'] == f'Run{len(calls)}'
+    print(f"✅ Collector took {len(calls)} snapshots in the background")
+
+
+def test_failed_snapshot_counts_as_collector_failure():
+    """A snapshot that cannot be saved is reported by the collector, not swallowed"""
+    import app
+
+    collector = SnapshotCollector(app.collect_snapshot)
+    with mock.patch.object(app.snapshot_writer, 'append', side_effect=OSError('disk full')):
+        assert collector.run_once() is None
+    status = collector.status()
+    assert status['failures'] == 1 and status['runs'] == 0
+    print("✅ Failed snapshots count as collector failures")
+
+
+def test_streaming_export():
+    """Chunked export matches the unchunked output and honours filters"""
+    import app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshots.csv')
+        writer = SnapshotWriter(path)
+        for label in ('Delhi', 'Mumbai', 'Nainital'):
+            writer.append(make_rows(30, label))
+
+        client = app.app.test_client()
+        with mock.patch.object(app, 'SNAPSHOT_FILE', path):
+            whole = client.get('/export/weather-data').data
+            with mock.patch.object(app, 'EXPORT_CHUNK_ROWS', 7):
+                chunked = client.get('/export/weather-data').data
+                compressed = client.get('/export/weather-data', headers={'Accept-Encoding': 'gzip'})
+            filtered = client.get('/export/weather-data?location=mumbai&start=2025-11-12 18:10&end=2025-11-12 18:19')
+            bad = client.get('/export/weather-data?end=soon')
+            utc = [datetime(2025, 11, 12, 18, minute).astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                   for minute in (10, 19)]
+            aware = client.get(f'/export/weather-data?location=mumbai&start={utc[0]}&end={utc[1]}')
+
+        assert whole == chunked
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(compressed.data) == whole
+
+        exported = pd.read_csv(io.BytesIO(whole))
+        assert len(exported) == 90 and (exported['telescope_score'] == 100).all()
+
+        subset = pd.read_csv(io.BytesIO(filtered.data))
+        assert len(subset) == 10 and set(subset['location']) == {'Mumbai'}
+        assert bad.status_code == 400
+        assert aware.status_code == 200 and aware.data == filtered.data, "UTC filters match local snapshot times"
+    print("✅ Streaming export is chunked, filtered and gzip-capable")
+
+
+if __name__ == "__main__":
+    print("🔭 Telescope Weather App - Snapshot Store Test")
+    print("=" * 50)
+    test_writer_appends_with_single_header()
+    test_writer_batches_rows()
+    test_writer_extends_existing_file()
+    test_tail_reader_matches_full_read()
+    test_manifest_tracks_appends()
+    test_collector_runs_on_cadence()
+    test_failed_snapshot_counts_as_collector_failure()
+    test_streaming_export()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the local AccuWeather stub, driving the app's live-data path
+"""
+
+import threading
+from unittest import mock
+
+from werkzeug.serving import make_server
+
+import app as telescope_app
+from accuweather_stub import StubConfig, create_stub_app
+
+
+class StubServer:
+    """Runs the stub on a free local port for the duration of a with-block"""
+
+    def __init__(self, config):
+        self.config = config
+        self.server = make_server('127.0.0.1', 0, create_stub_app(config), threaded=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+
+def live_app(url):
+    """Point the app at the stub with empty caches and closed circuits"""
+    telescope_app.response_cache.clear()
+    for breaker in telescope_app.circuit_breakers.values():
+        breaker.record_success()
+    return mock.patch.multiple(telescope_app, ACCUWEATHER_BASE_URL=url, ACCUWEATHER_API_KEY='stub')
+
+
+def test_live_path_against_stub():
+    """Current conditions, forecast and hourly data parse from the stub's responses"""
+    with StubServer(StubConfig()) as stub, live_app(stub.url):
+        weather = telescope_app.get_current_and_today_weather('nainital')
+        forecast = telescope_app.get_forecast_data('nainital')
+        hourly = telescope_app.get_hourly_today_weather('nainital')
+        search = telescope_app.search_location_key('Almora')
+        missing = telescope_app.search_location_key('Atlantis')
+
+    assert weather['api_source'] == 'AccuWeather Live Data'
+    assert 'today_max_temp' in weather and weather['stale'] is False
+    assert len(forecast) == 5 and len(hourly) == 8
+    assert search and missing is None
+    telescope_app.response_cache.clear()
+    print("✅ Live data path works against the stub")
+
+
+def test_stub_quota_opens_circuit():
+    """Once the stub's quota is spent the app falls back without further calls"""
+    with StubServer(StubConfig(quota=0)) as stub, live_app(stub.url):
+        weather = telescope_app.get_current_and_today_weather('nainital')
+        assert weather['api_source'].startswith('Enhanced Simulation')
+        assert telescope_app.circuit_breakers['current'].status()['state'] == 'open'
+
+        calls = telescope_app.http_client.session.get(f"{stub.url}/stub/stats").json()['calls']
+        assert calls == 2, "each quota response trips its circuit without being retried"
+        telescope_app.get_current_and_today_weather('nainital')
+        assert telescope_app.http_client.session.get(f"{stub.url}/stub/stats").json()['calls'] == calls
+
+    for breaker in telescope_app.circuit_breakers.values():
+        breaker.record_success()
+    print("✅ Stub quota exhaustion opens the circuit")
+
+
+if __name__ == "__main__":
+    print("🔭 Telescope Weather App - AccuWeather Stub Test")
+    print("=" * 50)
+    test_live_path_against_stub()
+    test_stub_quota_opens_circuit()
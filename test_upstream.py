@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Test script for the AccuWeather response cache and call budget
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date
+from unittest import mock
+
+import requests
+
+from circuit_breaker import CircuitBreaker
+from http_client import HttpClient
+from location_store import LocationKeyStore
+from response_cache import CallBudget, ResponseCache
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_response_cache_ttl_and_lru():
+    """Entries expire after their TTL and the least recently used is evicted"""
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=2, clock=clock)
+
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 2, ttl=600)
+    assert cache.get('a').value == 1
+
+    cache.set('c', 3)  # evicts 'b', which was used least recently
+    assert cache.get('b') is None
+    assert cache.get('c').value == 3
+
+    clock.now += 61
+    assert cache.get('a') is None
+
+    stats = cache.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 2 and stats['evictions'] == 1
+    print("✅ Response cache honours TTLs and LRU order")
+
+
+def test_call_budget_resets_daily():
+    """The budget refuses calls once spent and resets on a new day"""
+    day = [date(2025, 1, 1)]
+    budget = CallBudget(2, today=lambda: day[0])
+
+    assert budget.try_acquire() and budget.try_acquire()
+    assert not budget.try_acquire()
+    assert budget.stats()['remaining'] == 0
+
+    day[0] = date(2025, 1, 2)
+    assert budget.try_acquire()
+    assert budget.stats()['used'] == 1
+    print("✅ Call budget is enforced and resets daily")
+
+
+def test_call_budget_is_shared_between_processes():
+    """Budgets on the same file draw on one daily count, as separate processes do"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'budget', 'calls.sqlite3')
+        day = [date(2025, 1, 1)]
+        web = CallBudget(3, today=lambda: day[0], path=path)
+        collector = CallBudget(3, today=lambda: day[0], path=path)
+        assert not os.path.exists(path)
+
+        assert collector.try_acquire(reserve=1) and collector.try_acquire(reserve=1)
+        assert not collector.try_acquire(reserve=1)
+        assert web.try_acquire()
+        assert not web.try_acquire()
+        assert web.stats() == collector.stats()
+        assert web.stats()['used'] == 3 and web.stats()['rejected'] == 2
+
+        day[0] = date(2025, 1, 2)
+        assert web.try_acquire()
+        assert collector.stats()['used'] == 1
+        web._db.close()
+        collector._db.close()
+    print("✅ Call budget is shared through its file")
+
+
+def test_fetch_accuweather_uses_cache():
+    """Repeated identical calls reach the network only once"""
+    import app
+
+    app.response_cache.clear()
+    response = mock.Mock(status_code=200)
+    response.json.return_value = [{'Key': '123'}]
+
+    with mock.patch.object(app.http_client, 'get', return_value=response) as get:
+        first = app.fetch_accuweather('locations', '/locations/v1/cities/search', {'q': 'Almora'})
+        second = app.fetch_accuweather('locations', '/locations/v1/cities/search', {'q': 'Almora'})
+
+    assert first == second == [{'Key': '123'}]
+    assert get.call_count == 1
+    app.response_cache.clear()
+    print("✅ AccuWeather calls are served from the cache")
+
+
+def test_stale_while_revalidate():
+    """Expired responses are served at once and refreshed in the background"""
+    import threading
+    import app
+
+    clock = FakeClock()
+    cache = ResponseCache(max_stale=100, clock=clock)
+    cache.set('a', 1, ttl=10)
+    clock.now += 50
+    assert cache.get('a') is None
+    assert cache.get_stale('a').value == 1 and not cache.get_stale('a').is_fresh(clock.now)
+    clock.now += 60
+    assert cache.get_stale('a') is None
+
+    path = '/currentconditions/v1/123'
+    key = app.accuweather_cache_key(path, {})
+    app.response_cache.clear()
+    app.response_cache.set(key, ['old'], ttl=-1)
+
+    release = threading.Event()
+    response = mock.Mock(status_code=200)
+    response.json.return_value = ['new']
+
+    def slow_get(*args, **kwargs):
+        release.wait(2)
+        return response
+
+    with mock.patch.object(app.http_client, 'get', side_effect=slow_get) as get:
+        entry = app.fetch_accuweather_entry('current', path)
+        assert entry.value == ['old']
+        assert app.data_freshness(entry)['stale']
+        assert app.fetch_accuweather('current', path) == ['old']  # refresh already running
+        release.set()
+        for _ in range(100):
+            if app.response_cache.get(key) is not None:
+                break
+            threading.Event().wait(0.02)
+
+    assert get.call_count == 1
+    assert app.fetch_accuweather('current', path) == ['new']
+    app.response_cache.clear()
+    print("✅ Stale responses are served while they refresh")
+
+
+def test_collector_refetches_stale_entries():
+    """The collector waits for a fresh response instead of snapshotting a stale one"""
+    import app
+
+    path = '/currentconditions/v1/456'
+    app.response_cache.clear()
+    app.response_cache.set(app.accuweather_cache_key(path, {}), ['old'], ttl=-1)
+    response = mock.Mock(status_code=200)
+    response.json.return_value = ['new']
+
+    with mock.patch.object(app.http_client, 'get', return_value=response) as get:
+        token = app.collecting.set(True)
+        try:
+            assert app.fetch_accuweather('current', path) == ['new']
+        finally:
+            app.collecting.reset(token)
+    assert get.call_count == 1
+    app.response_cache.clear()
+    print("✅ The collector re-fetches stale responses")
+
+
+def test_circuit_breaker_states():
+    """Opens after failures, lets one trial through later, closes on success"""
+    clock = FakeClock()
+    breaker = CircuitBreaker('current', failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.record_failure('timeout')
+    assert breaker.allow()
+    breaker.record_failure('timeout')
+    assert breaker.state == 'open' and not breaker.allow()
+
+    clock.now += 10
+    assert breaker.allow()  # the half-open trial
+    assert not breaker.allow()
+    breaker.record_failure('timeout')
+    assert breaker.state == 'open' and breaker.reset_timeout == 20
+
+    clock.now += 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.reset_timeout == 10
+
+    breaker.record_failure('HTTP 503', trip=True)
+    assert breaker.status()['state'] == 'open' and breaker.status()['retry_in_seconds'] == 10
+    print("✅ Circuit breaker opens, half-opens and closes")
+
+
+def test_quota_response_opens_circuit():
+    """A 503 quota response skips later calls to that family without a request"""
+    import app
+
+    app.response_cache.clear()
+    breaker = app.circuit_breakers['forecasts']
+    quota = mock.Mock(status_code=503, text='The allowed number of requests has been exceeded.')
+
+    with mock.patch.object(app.http_client, 'get', return_value=quota) as get:
+        assert app.fetch_accuweather('daily', '/forecasts/v1/daily/5day/1') is None
+        assert app.fetch_accuweather('hourly', '/forecasts/v1/hourly/12hour/1') is None
+    assert get.call_count == 1
+    assert breaker.status()['state'] == 'open'
+    assert app.circuit_breakers['current'].status()['state'] == 'closed'
+
+    breaker.record_success()
+    print("✅ Quota responses open the circuit for that endpoint family")
+
+
+def test_run_concurrently_deadline():
+    """Slow calls run in parallel and fall back once the deadline passes"""
+    import time
+    import app
+
+    def slow(value, delay):
+        time.sleep(delay)
+        return value
+
+    start = time.time()
+    results = app.run_concurrently(app.upstream_executor, {
+        'a': (slow, ('a', 0.2), lambda: 'fallback'),
+        'b': (slow, ('b', 0.2), lambda: 'fallback'),
+        'c': (slow, ('c', 2.0), lambda: 'fallback'),
+        'd': (slow, (None, 'bad'), lambda: 'failed')
+    }, deadline=0.5)
+    elapsed = time.time() - start
+
+    assert results == {'a': 'a', 'b': 'b', 'c': 'fallback', 'd': 'failed'}
+    assert elapsed < 1.0
+    print(f"✅ Concurrent fetch stage respects the deadline ({elapsed:.2f}s)")
+
+
+def test_http_client_retries_with_backoff():
+    """5xx/429 responses and connection errors are retried, then given up on"""
+    delays = []
+    client = HttpClient(max_retries=2, sleep=delays.append)
+
+    busy = mock.Mock(status_code=503, headers={})
+    limited = mock.Mock(status_code=429, headers={'Retry-After': '1'})
+    ok = mock.Mock(status_code=200, headers={})
+
+    with mock.patch.object(client.session, 'get', side_effect=[busy, limited, ok]) as get:
+        assert client.get('https://example.test/x').status_code == 200
+    assert get.call_count == 3
+    assert 0 <= delays[0] <= client.backoff_base and delays[1] == 1.0
+
+    with mock.patch.object(client.session, 'get', return_value=busy) as get:
+        assert client.get('https://example.test/x').status_code == 503
+    assert get.call_count == 3
+
+    with mock.patch.object(client.session, 'get', side_effect=requests.ConnectionError('down')):
+        try:
+            client.get('https://example.test/x')
+            assert False, 'expected ConnectionError'
+        except requests.ConnectionError:
+            pass
+
+    with mock.patch.object(client.session, 'get', return_value=mock.Mock(status_code=404)) as get:
+        assert client.get('https://example.test/x').status_code == 404
+    assert get.call_count == 1
+    print("✅ HTTP client retries transient failures with backoff")
+
+
+def test_retries_are_charged_to_the_budget():
+    """Every retry uses the daily budget, and retries stop once it is spent"""
+    import app
+
+    app.response_cache.clear()
+    busy = mock.Mock(status_code=500, headers={}, text='busy')
+    budget = CallBudget(daily_limit=2)
+    client = HttpClient(max_retries=2, sleep=lambda delay: None)
+
+    with mock.patch.object(app, 'call_budget', budget), mock.patch.object(app, 'http_client', client), \
+            mock.patch.object(client.session, 'get', return_value=busy) as get:
+        assert app.fetch_accuweather('current', '/currentconditions/v1/1') is None
+    assert get.call_count == 2, "the third attempt would exceed the budget"
+    assert budget.stats()['used'] == 2 and budget.stats()['rejected'] == 1
+
+    app.circuit_breakers['current'].record_success()
+    app.response_cache.clear()
+    print("✅ Retries are charged to the call budget")
+
+
+def test_collector_leaves_budget_reserve():
+    """Collector calls, also on the executor pools, stop short of the viewers' reserve"""
+    import app
+
+    budget = CallBudget(daily_limit=4)
+    with mock.patch.object(app, 'call_budget', budget), mock.patch.object(app, 'COLLECTOR_BUDGET_RESERVE', 3):
+        token = app.collecting.set(True)
+        try:
+            granted = app.run_concurrently(app.upstream_executor, {
+                n: (app.acquire_upstream_call, ('current', f'/collector/{n}'), lambda: None) for n in range(3)})
+        finally:
+            app.collecting.reset(token)
+        assert sorted(granted.values()) == [False, False, True]
+        assert app.acquire_upstream_call('current', '/viewer')
+    assert budget.stats()['used'] == 2
+    print("✅ The collector leaves a budget reserve for viewers")
+
+
+def test_location_store_opens_on_first_use():
+    """Importing the app writes no files; the seeded store is created when a key is needed"""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=repo, COLLECTOR_ENABLED='false')
+        env.pop('DATA_CACHE_DIR', None)
+        subprocess.run([sys.executable, '-c', 'import app; assert app.location_keys is None'],
+                       cwd=tmp, env=env, check=True, capture_output=True)
+        assert os.listdir(tmp) == []
+
+        import app
+        with mock.patch.object(app, 'location_keys', None), \
+                mock.patch.dict(os.environ, {'DATA_CACHE_DIR': tmp}):
+            store = app.get_location_store()
+            assert store is app.get_location_store()
+            assert store.get('Nainital') == app.LOCATION_KEYS['Nainital']
+            store.close()
+        assert os.listdir(tmp) == ['location_keys.sqlite3']
+    print("✅ Location store is opened on first use")
+
+
+def test_upstream_errors_hide_the_api_key():
+    """Connection errors quote the URL; the key is masked in breaker status and logs"""
+    import logging
+    import app
+    from logging_config import MaskApiKeysFilter
+
+    app.response_cache.clear()
+
+    def refuse(url, params=None, timeout=None):
+        raise requests.ConnectionError(f"Max retries exceeded with url: {url}?apikey={params['apikey']}&q=x")
+
+    with mock.patch.object(app, 'ACCUWEATHER_API_KEY', 'SECRET123'), \
+            mock.patch.object(app.http_client, 'max_retries', 0), \
+            mock.patch.object(app.http_client.session, 'get', side_effect=refuse):
+        try:
+            app.fetch_accuweather('current', '/currentconditions/v1/1')
+            assert False, 'expected ConnectionError'
+        except requests.ConnectionError:
+            pass
+    last_error = app.circuit_breakers['current'].status()['last_error']
+    assert 'SECRET123' not in last_error and 'apikey=***' in last_error
+    assert b'SECRET123' not in app.app.test_client().get('/api/upstream-status').data
+    app.circuit_breakers['current'].record_success()
+
+    record = logging.LogRecord('app', logging.WARNING, __file__, 1, "failed: %s", ('/x?apikey=SECRET123',), None)
+    assert MaskApiKeysFilter().filter(record) and record.getMessage() == 'failed: /x?apikey=***'
+    print("✅ Upstream errors never show the API key")
+
+
+def test_location_key_store():
+    """Searched keys persist on disk; misses are remembered for a shorter time"""
+    clock = FakeClock()
+    searches = []
+
+    def search(city):
+        searches.append(city)
+        if city == 'Atlantis':
+            return None
+        if city == 'Offline':
+            raise LookupError('search unavailable')
+        return f"key-{city.lower()}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'keys.sqlite3')
+        store = LocationKeyStore(path, max_entries=1, negative_ttl=60, clock=clock)
+        store.seed({'Nainital': '202396'})
+
+        assert store.resolve('Nainital', search) == '202396'
+        assert store.resolve('Almora', search) == 'key-almora'
+        assert store.resolve(' almora ', search) == 'key-almora'
+        assert store.resolve('Atlantis', search) is None
+        assert store.resolve('Atlantis', search) is None
+        try:
+            store.resolve('Offline', search)
+        except LookupError:
+            pass
+        assert not store.is_known('Offline')
+        assert searches == ['Almora', 'Atlantis', 'Offline']
+
+        clock.now += 61
+        assert store.resolve('Atlantis', search) is None
+        assert searches[-1] == 'Atlantis'
+        store.close()
+
+        # A new process finds the earlier answers on disk
+        reopened = LocationKeyStore(path, clock=clock)
+        assert reopened.resolve_many(['Nainital', 'Almora', 'Pune'], search) == {
+            'Nainital': '202396', 'Almora': 'key-almora', 'Pune': 'key-pune'}
+        assert searches.count('Almora') == 1
+        assert reopened.stats()['stored'] == 4
+        reopened.close()
+    print("✅ Location keys are searched once and remembered")
+
+
+if __name__ == "__main__":
+    print("🔭 Telescope Weather App - Upstream Test")
+    print("=" * 50)
+    test_response_cache_ttl_and_lru()
+    test_call_budget_resets_daily()
+    test_call_budget_is_shared_between_processes()
+    test_fetch_accuweather_uses_cache()
+    test_stale_while_revalidate()
+    test_collector_refetches_stale_entries()
+    test_circuit_breaker_states()
+    test_quota_response_opens_circuit()
+    test_run_concurrently_deadline()
+    test_http_client_retries_with_backoff()
+    test_retries_are_charged_to_the_budget()
+    test_collector_leaves_budget_reserve()
+    test_upstream_errors_hide_the_api_key()
+    test_location_key_store()
+    test_location_store_opens_on_first_use()
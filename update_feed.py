@@ -0,0 +1,106 @@
+"""
+Shared, versioned state for pushing condition updates to dashboards.
+
+Every open dashboard used to re-download the whole payload every five
+minutes.  The collector (and on-demand fetches) now publish the current
+conditions per location into an UpdateFeed, and streaming clients wait on
+it: a topic's version only moves when its data actually changes, so the
+number of pushes depends on how often the weather changes rather than on
+how many browsers are watching.
+"""
+
+import json
+import threading
+import time
+
+
+def default_fingerprint(data):
+    return json.dumps(data, sort_keys=True, default=str)
+
+
+class UpdateFeed:
+    """Latest value per topic with a version that bumps only on change"""
+
+    def __init__(self, fingerprint=default_fingerprint):
+        self.fingerprint = fingerprint
+        self._topics = {}  # topic -> (version, fingerprint, data)
+        self._changed = threading.Condition()
+        self._subscribers = 0
+        self._published = 0
+        self._unchanged = 0
+
+    def publish(self, topic, data):
+        """Store data for a topic; returns False (and wakes nobody) if it is unchanged"""
+        fingerprint = self.fingerprint(data)
+        with self._changed:
+            version, current, _ = self._topics.get(topic, (0, None, None))
+            if version and current == fingerprint:
+                self._unchanged += 1
+                return False
+            self._topics[topic] = (version + 1, fingerprint, data)
+            self._published += 1
+            self._changed.notify_all()
+        return True
+
+    def latest(self, topic):
+        """(version, data) for a topic; version 0 means nothing published yet"""
+        with self._changed:
+            version, _, data = self._topics.get(topic, (0, None, None))
+            return version, data
+
+    def wait(self, topic, after_version, timeout=None):
+        """Block until the topic moves past after_version; None on timeout"""
+        with self._changed:
+            changed = self._changed.wait_for(
+                lambda: self._topics.get(topic, (0,))[0] > after_version, timeout)
+            if not changed:
+                return None
+            version, _, data = self._topics[topic]
+            return version, data
+
+    def subscribe(self, topic, after_version=0, heartbeat=15):
+        """Yield (version, data) on every change, or None after `heartbeat` idle seconds"""
+        with self._changed:
+            self._subscribers += 1
+        try:
+            while True:
+                update = self.wait(topic, after_version, timeout=heartbeat)
+                if update is not None:
+                    after_version = update[0]
+                yield update
+        finally:
+            with self._changed:
+                self._subscribers -= 1
+
+    def stats(self):
+        with self._changed:
+            return {
+                'topics': {topic: version for topic, (version, _, _) in self._topics.items()},
+                'subscribers': self._subscribers,
+                'published': self._published,
+                'unchanged': self._unchanged
+            }
+
+
+FEED_EPOCH = format(int(time.time()), 'x')
+
+
+def event_id(version):
+    """SSE event id; the process epoch stops ids from a previous run being trusted"""
+    return f"{FEED_EPOCH}-{version}"
+
+
+def parse_event_id(value):
+    """Version from a Last-Event-ID header, or 0 if it is missing or from another run"""
+    epoch, _, version = (value or '').partition('-')
+    if epoch != FEED_EPOCH or not version.isdigit():
+        return 0
+    return int(version)
+
+
+def format_event(event, data, version=None):
+    """One text/event-stream message carrying JSON-serialized data"""
+    lines = [] if version is None else [f"id: {event_id(version)}"]
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'